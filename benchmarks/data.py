@@ -0,0 +1,96 @@
+"""
+Seed data for the benchmarks: users, tasks with a realistic completion mix,
+presence and logged-in sessions. Call after ``django.setup()``.
+"""
+import random
+from importlib import import_module
+
+PASSWORD = 'bench-pass-123'
+ADMIN = 'bench-admin'
+MEMBER = 'bench-user'
+VERBS = ['Write', 'Review', 'Update', 'Fix', 'Plan', 'Email', 'Prepare', 'Ship', 'Test', 'Book']
+NOUNS = ['report', 'invoice', 'release notes', 'budget', 'slides', 'onboarding doc', 'roadmap',
+         'backup', 'newsletter', 'interview', 'retro', 'dashboard', 'contract', 'flight']
+DETAILS = ['before Friday', 'for the team', 'with finance', 'for Q3', 'after standup', 'again', '']
+
+
+def task_fields(rng):
+    title = f"{rng.choice(VERBS)} {rng.choice(NOUNS)} {rng.choice(DETAILS)}".strip()
+    return {'title': title, 'description': f"{title}. " * rng.randint(0, 4)}
+
+
+def login_session(user):
+    """Create a logged-in session for ``user`` the way Client.force_login does; return its key."""
+    from django.conf import settings
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+def seed(users=50, tasks=20, completed_ratio=0.6, online_ratio=0.2, pool=0, random_seed=0):
+    """
+    Create ADMIN, MEMBER and ``users`` more accounts with ``tasks`` tasks each,
+    about ``completed_ratio`` of them done, and mark ``online_ratio`` of the
+    users as recently seen. MEMBER also gets ``pool`` pending tasks for each
+    mutating scenario to consume. Everything goes in with bulk_create, so
+    the counters are filled in directly instead of by the Task signals.
+
+    Returns the session keys for ADMIN and MEMBER and the task id pools.
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.utils.timezone import now
+
+    from myapp.models import Task, UserPresence, UserProfile
+
+    rng = random.Random(random_seed)
+    # Hash once: every account shares the password, and PBKDF2 per user would dominate seeding
+    password = make_password(PASSWORD)
+    accounts = [
+        User(username=ADMIN, email=f'{ADMIN}@example.com', password=password, is_staff=True, is_superuser=True),
+        User(username=MEMBER, email=f'{MEMBER}@example.com', password=password),
+        *(User(username=f'user{i}', email=f'user{i}@example.com', password=password) for i in range(users)),
+    ]
+    User.objects.bulk_create(accounts, batch_size=500)
+    accounts = list(User.objects.filter(username__in=[account.username for account in accounts]))
+
+    rows, profiles = [], []
+    for account in accounts:
+        completed = 0
+        for _ in range(tasks):
+            done = rng.random() < completed_ratio
+            completed += done
+            rows.append(Task(user=account, is_completed=done, **task_fields(rng)))
+        profiles.append(UserProfile(
+            user=account, name=account.username, email=account.email,
+            role='admin' if account.is_superuser else 'user',
+            task_count=tasks, completed_task_count=completed, pending_task_count=tasks - completed,
+        ))
+    UserProfile.objects.bulk_create(profiles, batch_size=500)
+    Task.objects.bulk_create(rows, batch_size=1000)
+
+    member = next(account for account in accounts if account.username == MEMBER)
+    pools = {}
+    for name in ('complete', 'edit', 'delete'):
+        created = Task.objects.bulk_create([Task(user=member, **task_fields(rng)) for _ in range(pool)])
+        pools[name] = [task.pk for task in created]
+    member_profile = next(profile for profile in profiles if profile.user_id == member.pk)
+    UserProfile.objects.filter(user=member).update(
+        task_count=tasks + 3 * pool, pending_task_count=member_profile.pending_task_count + 3 * pool,
+    )
+
+    seen = now()
+    UserPresence.objects.bulk_create([
+        UserPresence(user=account, last_seen=seen) for account in rng.sample(accounts, int(len(accounts) * online_ratio))
+    ])
+
+    admin = next(account for account in accounts if account.username == ADMIN)
+    return {
+        'sessions': {'admin': login_session(admin), 'member': login_session(member)},
+        'pools': pools,
+    }
@@ -0,0 +1,77 @@
+"""
+Password hasher cost: milliseconds per password check and logins per second per core.
+
+Times check_password for each candidate parameter set, so PASSWORD_HASHER and
+its PASSWORD_PBKDF2_* / PASSWORD_ARGON2_* settings can be picked to fit a
+login latency and CPU budget:
+
+    python -m benchmarks.hashers --runs 10
+    python -m benchmarks.hashers --pbkdf2 600000 1000000 --argon2 2,65536,4 3,102400,8
+"""
+import argparse
+import os
+import statistics
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangs.settings')
+django.setup()
+
+from django.contrib.auth import hashers  # noqa: E402
+
+
+def pbkdf2(iterations):
+    hasher = hashers.PBKDF2PasswordHasher()
+    hasher.iterations = iterations
+    return f'pbkdf2 iterations={iterations}', f'PASSWORD_PBKDF2_ITERATIONS={iterations}', hasher
+
+
+def argon2(spec):
+    time_cost, memory_cost, parallelism = (int(value) for value in spec.split(','))
+    hasher = hashers.Argon2PasswordHasher()
+    hasher.time_cost, hasher.memory_cost, hasher.parallelism = time_cost, memory_cost, parallelism
+    env = (f'PASSWORD_ARGON2_TIME_COST={time_cost} PASSWORD_ARGON2_MEMORY_COST={memory_cost} '
+           f'PASSWORD_ARGON2_PARALLELISM={parallelism}')
+    return f'argon2 t={time_cost} m={memory_cost // 1024}MiB p={parallelism}', env, hasher
+
+
+def measure(hasher, runs):
+    """Median seconds for one verify, which is what every login pays."""
+    encoded = hasher.encode('correct horse battery staple', hasher.salt())
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        hasher.verify('correct horse battery staple', encoded)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--pbkdf2', type=int, nargs='*', metavar='ITERATIONS',
+                        default=[260000, 600000, hashers.PBKDF2PasswordHasher.iterations])
+    parser.add_argument('--argon2', nargs='*', metavar='TIME,MEMORY_KIB,PARALLELISM',
+                        default=['1,47104,1', '2,19456,1', '2,65536,4', '2,102400,8'])
+    parser.add_argument('--target-ms', type=float, default=100,
+                        help="Flag configurations whose check takes longer than this.")
+    args = parser.parse_args()
+
+    candidates = [pbkdf2(iterations) for iterations in args.pbkdf2]
+    try:
+        import argon2 as _  # noqa: F401
+        candidates += [argon2(spec) for spec in args.argon2]
+    except ImportError:
+        print("argon2-cffi is not installed; skipping argon2.\n")
+
+    print(f"{'hasher':<36} {'ms/check':>9} {'logins/s/core':>14}")
+    for label, env, hasher in candidates:
+        seconds = measure(hasher, args.runs)
+        flag = '  over target' if seconds * 1000 > args.target_ms else ''
+        print(f"{label:<36} {seconds * 1000:>9.1f} {1 / seconds:>14.1f}{flag}")
+        print(f"    {env}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Dashboard throughput and latency under the sync WSGI and the ASGI (uvicorn) serving modes.
+
+Seeds a throwaway database, starts gunicorn once per SERVER_MODE and fires
+concurrent logged-in dashboard requests at it:
+
+    python -m benchmarks.serving_modes --requests 400 --concurrency 16
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.request import Request, urlopen
+
+from benchmarks.server import gunicorn
+
+MODES = ('wsgi', 'asgi')
+
+
+def prepare(users, tasks):
+    """Migrate the bench database, seed it and return the admin's session cookie."""
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.core.management import call_command
+
+    from benchmarks.data import seed
+
+    call_command('migrate', verbosity=0)
+    sessions = seed(users, tasks)['sessions']
+    return f"{settings.SESSION_COOKIE_NAME}={sessions['admin']}"
+
+
+def fetch(url, cookie):
+    started = time.perf_counter()
+    try:
+        with urlopen(Request(url, headers={'Cookie': cookie}), timeout=60) as response:
+            response.read()
+            ok = response.status == 200
+    except OSError:
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def run(mode, cookie, requests, concurrency, path):
+    with gunicorn({'SERVER_MODE': mode}) as port:
+        url = f'http://127.0.0.1:{port}{path}'
+        fetch(url, cookie)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(lambda _: fetch(url, cookie), range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    cuts = statistics.quantiles(latencies, n=100)
+    return {
+        'rps': requests / elapsed,
+        'p50': cuts[49] * 1000,
+        'p95': cuts[94] * 1000,
+        'p99': cuts[98] * 1000,
+        'errors': sum(not ok for _, ok in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--tasks', type=int, default=40, help="Tasks per seeded user.")
+    parser.add_argument('--workers', type=int, default=1, help="WEB_CONCURRENCY for both modes.")
+    parser.add_argument('--path', default='/dashboard/?task_query=task')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            'DJANGO_SETTINGS_MODULE': 'djangs.settings',
+            'DATABASE_URL': f"sqlite:///{Path(tmp) / 'bench.sqlite3'}",
+            'WEB_CONCURRENCY': str(args.workers),
+        })
+        cookie = prepare(args.users, args.tasks)
+
+        print(f"{'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for mode in MODES:
+            stats = run(mode, cookie, args.requests, args.concurrency, args.path)
+            print(f"{mode:<6} {stats['rps']:>8.1f} {stats['p50']:>8.1f} {stats['p95']:>8.1f} "
+                  f"{stats['p99']:>8.1f} {stats['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Per-request dashboard query counts under the db and cached_db session engines.
+
+Runs against a throwaway test database:
+
+    python -m benchmarks.session_queries --requests 20
+"""
+import argparse
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangs.settings')
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext, setup_databases, setup_test_environment, teardown_databases,
+)
+from django.urls import reverse  # noqa: E402
+
+ENGINES = [
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+]
+
+
+def measure(engine, requests):
+    cache.clear()
+    with override_settings(SESSION_ENGINE=engine):
+        client = Client()
+        client.force_login(User.objects.get(username='bench'))
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(requests):
+                client.get(reverse('dashboard'))
+    session_queries = [q for q in queries.captured_queries if 'django_session' in q['sql']]
+    return len(queries) / requests, len(session_queries) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        User.objects.create_user('bench', 'bench@example.com', 'bench-pass-123')
+        print(f"{'session engine':<45} {'queries/req':>12} {'session/req':>12}")
+        for engine in ENGINES:
+            total, session = measure(engine, args.requests)
+            print(f"{engine:<45} {total:>12.1f} {session:>12.1f}")
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
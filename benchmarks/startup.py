@@ -0,0 +1,50 @@
+"""
+Gunicorn cold-start time: seconds from spawning the server to its first 200 response.
+
+Runs each configuration a few times and reports the median, so a regression
+in import or boot time shows up as a number:
+
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import statistics
+import time
+from urllib.request import urlopen
+
+from benchmarks.server import gunicorn
+
+CONFIGS = [
+    ('wsgi, no preload', {'SERVER_MODE': 'wsgi', 'GUNICORN_PRELOAD': '0'}),
+    ('wsgi, preload', {'SERVER_MODE': 'wsgi', 'GUNICORN_PRELOAD': '1'}),
+    ('asgi, no preload', {'SERVER_MODE': 'asgi', 'GUNICORN_PRELOAD': '0'}),
+    ('asgi, preload', {'SERVER_MODE': 'asgi', 'GUNICORN_PRELOAD': '1'}),
+]
+
+
+def first_response(overrides, workers, timeout=60):
+    started = time.perf_counter()
+    with gunicorn({**overrides, 'WEB_CONCURRENCY': str(workers)}, wait=False) as port:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urlopen(f'http://127.0.0.1:{port}/login/', timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError(f"no response within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"{'configuration':<20} {'median s':>9} {'min s':>7} {'max s':>7}")
+    for label, overrides in CONFIGS:
+        times = [first_response(overrides, args.workers) for _ in range(args.runs)]
+        print(f"{label:<20} {statistics.median(times):>9.3f} {min(times):>7.3f} {max(times):>7.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+"""
+Scripted scenario benchmarks for the tasksync views.
+
+Seeds users and tasks, runs each scenario against the Django test client or
+a local gunicorn, and writes throughput, latency percentiles and queries per
+request to benchmarks/results/ as JSON:
+
+    python -m benchmarks.suite --target client --requests 50
+    python -m benchmarks.suite --target gunicorn --concurrency 8 --compare benchmarks/results/OLD.json
+"""
+import argparse
+import http.client
+import json
+import os
+import re
+import statistics
+import subprocess
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlencode
+
+import django
+
+from benchmarks.server import BASE_DIR, gunicorn
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+# ``session`` is "admin", "member" or None (anonymous); ``path`` and ``data`` are
+# called per request, ``path`` with the task id pools the mutating scenarios draw from
+Scenario = namedtuple('Scenario', 'name method session path data')
+
+
+def scenarios():
+    from django.urls import reverse
+
+    from benchmarks.data import MEMBER, PASSWORD
+
+    dashboard = reverse('dashboard')
+    return [
+        Scenario('login', 'POST', None, lambda pools: reverse('login'),
+                 lambda: {'username': MEMBER, 'password': PASSWORD}),
+        Scenario('dashboard_all', 'GET', 'member', lambda pools: f'{dashboard}?status=all', None),
+        Scenario('dashboard_pending', 'GET', 'member', lambda pools: f'{dashboard}?status=pending', None),
+        Scenario('dashboard_completed', 'GET', 'member', lambda pools: f'{dashboard}?status=completed', None),
+        Scenario('search', 'GET', 'member', lambda pools: f'{dashboard}?task_query=report', None),
+        Scenario('add_task', 'POST', 'member', lambda pools: dashboard,
+                 lambda: {'add_task': '1', 'title': 'Benchmark task', 'description': 'added by the suite'}),
+        Scenario('complete_task', 'GET', 'member',
+                 lambda pools: reverse('complete_task', args=[pools['complete'].pop()]), None),
+        Scenario('edit_task', 'POST', 'member',
+                 lambda pools: reverse('edit_task', args=[pools['edit'].pop()]),
+                 lambda: {'title': 'Edited by the suite', 'description': 'edited'}),
+        Scenario('delete_task', 'POST', 'member',
+                 lambda pools: reverse('delete_task', args=[pools['delete'].pop()]), None),
+        Scenario('admin_dashboard', 'GET', 'admin', lambda pools: dashboard, None),
+        Scenario('admin_user_search', 'GET', 'admin', lambda pools: f'{dashboard}?user_query=user1', None),
+    ]
+
+
+class ClientTarget:
+    """In-process Django test client; queries counted with CaptureQueriesContext."""
+    concurrent = False
+
+    def __init__(self, sessions):
+        from django.conf import settings
+        from django.test import Client
+
+        self.clients = {}
+        for role, session_key in sessions.items():
+            self.clients[role] = Client()
+            self.clients[role].cookies[settings.SESSION_COOKIE_NAME] = session_key
+
+    def request(self, scenario, path, data):
+        from django.db import connection
+        from django.test import Client
+        from django.test.utils import CaptureQueriesContext
+
+        client = self.clients[scenario.session] if scenario.session else Client()
+        send = client.post if scenario.method == 'POST' else client.get
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = send(path, data or {})
+            elapsed = time.perf_counter() - started
+        return elapsed, response.status_code, len(queries)
+
+
+class HTTPTarget:
+    """
+    A local gunicorn over HTTP. Queries per request come from the Server-Timing
+    header, so the server runs with INSTRUMENTATION=True.
+    """
+    concurrent = True
+
+    def __init__(self, port, sessions):
+        from django.conf import settings
+        from django.utils.crypto import get_random_string
+
+        self.port = port
+        self.csrf_token = get_random_string(32)
+        self.cookies = {None: f'{settings.CSRF_COOKIE_NAME}={self.csrf_token}'}
+        for role, session_key in sessions.items():
+            self.cookies[role] = f'{self.cookies[None]}; {settings.SESSION_COOKIE_NAME}={session_key}'
+
+    def request(self, scenario, path, data):
+        headers = {'Cookie': self.cookies[scenario.session]}
+        body = None
+        if scenario.method == 'POST':
+            body = urlencode({**(data or {}), 'csrfmiddlewaretoken': self.csrf_token})
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        try:
+            started = time.perf_counter()
+            connection.request(scenario.method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            elapsed = time.perf_counter() - started
+        finally:
+            connection.close()
+        match = SERVER_TIMING_QUERIES.search(response.getheader('Server-Timing') or '')
+        return elapsed, response.status, int(match.group(1)) if match else None
+
+
+def run_scenario(target, scenario, pools, requests, concurrency):
+    def once(_):
+        return target.request(scenario, scenario.path(pools), scenario.data() if scenario.data else None)
+
+    once(None)  # warm-up, not measured
+    started = time.perf_counter()
+    if target.concurrent and concurrency > 1:
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(once, range(requests)))
+    else:
+        results = [once(i) for i in range(requests)]
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency * 1000 for latency, _, _ in results]
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    queries = [count for _, _, count in results if count is not None]
+    return {
+        'requests': requests,
+        'errors': sum(status >= 400 for _, status, _ in results),
+        'rps': round(requests / elapsed, 2),
+        'mean_ms': round(statistics.fmean(latencies), 2),
+        'p50_ms': round(cuts[49], 2),
+        'p95_ms': round(cuts[94], 2),
+        'p99_ms': round(cuts[98], 2),
+        'queries_per_request': round(statistics.fmean(queries), 2) if queries else None,
+    }
+
+
+def run_suite(target, pools, args):
+    results = {}
+    print(f"{'scenario':<22} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'errors':>7}")
+    for scenario in scenarios():
+        if args.only and scenario.name not in args.only:
+            continue
+        stats = results[scenario.name] = run_scenario(target, scenario, pools, args.requests, args.concurrency)
+        queries = stats['queries_per_request']
+        print(f"{scenario.name:<22} {stats['rps']:>8.1f} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+              f"{stats['p99_ms']:>8.1f} {'-' if queries is None else f'{queries:.1f}':>8} {stats['errors']:>7}")
+    return results
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old, new):
+    """Print req/s, p95 and queries per request against an earlier results file."""
+    print(f"\nvs {old['commit']} ({old['target']}, {old['created_at']})")
+    print(f"{'scenario':<22} {'req/s':>18} {'p95 ms':>18} {'queries':>12}")
+    for name, stats in new['scenarios'].items():
+        before = old['scenarios'].get(name)
+        if not before:
+            continue
+        change = (stats['rps'] - before['rps']) / before['rps'] * 100 if before['rps'] else 0
+        print(f"{name:<22} {before['rps']:>7.1f} → {stats['rps']:>6.1f} {change:+5.0f}% "
+              f"{before['p95_ms']:>7.1f} → {stats['p95_ms']:>7.1f} "
+              f"{before['queries_per_request'] or 0:>5.1f} → {stats['queries_per_request'] or 0:>4.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--target', choices=['client', 'gunicorn'], default='client')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--tasks', type=int, default=20, help="Tasks per seeded user.")
+    parser.add_argument('--completed-ratio', type=float, default=0.6)
+    parser.add_argument('--requests', type=int, default=50, help="Measured requests per scenario.")
+    parser.add_argument('--concurrency', type=int, default=4, help="Parallel clients (gunicorn target only).")
+    parser.add_argument('--only', nargs='+', metavar='SCENARIO', help="Run only these scenarios.")
+    parser.add_argument('-o', '--output', help="Results file (default: benchmarks/results/<time>-<commit>-<target>.json).")
+    parser.add_argument('--compare', help="Earlier results file to compare against.")
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangs.settings')
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.target == 'gunicorn':
+            os.environ['DATABASE_URL'] = f"sqlite:///{Path(tmp) / 'bench.sqlite3'}"
+        django.setup()
+
+        from django.core.management import call_command
+        from django.test.utils import setup_databases, setup_test_environment, teardown_databases
+
+        from benchmarks.data import seed
+
+        seed_options = dict(users=args.users, tasks=args.tasks, completed_ratio=args.completed_ratio,
+                            pool=args.requests + 1)
+        if args.target == 'client':
+            setup_test_environment()
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                seeded = seed(**seed_options)
+                results = run_suite(ClientTarget(seeded['sessions']), seeded['pools'], args)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+        else:
+            call_command('migrate', verbosity=0)
+            seeded = seed(**seed_options)
+            with gunicorn({'INSTRUMENTATION': 'True'}) as port:
+                results = run_suite(HTTPTarget(port, seeded['sessions']), seeded['pools'], args)
+
+    created_at = datetime.now(timezone.utc)
+    report = {
+        'commit': current_commit(),
+        'created_at': created_at.isoformat(timespec='seconds'),
+        'target': args.target,
+        'options': {key: getattr(args, key) for key in ('users', 'tasks', 'completed_ratio', 'requests', 'concurrency')},
+        'scenarios': results,
+    }
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{created_at:%Y%m%d-%H%M%S}-{report['commit'] or 'nogit'}-{args.target}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + '\n')
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text()), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,77 @@
+import multiprocessing
 import os
+import time
+
+started_at = time.monotonic()
+cpu_count = multiprocessing.cpu_count()
+
+# SERVER_MODE=asgi serves djangs.asgi through uvicorn workers; the default is sync WSGI
+server_mode = os.getenv("SERVER_MODE", "wsgi")
+
+# GUNICORN_WORKER_CLASS picks the WSGI worker: gthread (default) or gevent (pip install gevent)
+if server_mode == "asgi":
+    wsgi_app = "djangs.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "djangs.wsgi:application"
+    worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+
+if worker_class == "gevent":
+    # Patch before Django is preloaded so its sockets and locks are cooperative
+    from gevent import monkey
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:
+        pass
+
+# Sized from the host unless overridden: (2 x cores) + 1 processes, 2 threads per core.
+# Processes only share sessions, dashboard cache versions and metrics through a shared
+# CACHE_BACKEND (file or redis), so with the per-process locmem default there is one
+shared_cache = os.getenv("CACHE_BACKEND", "locmem") != "locmem"
+workers = int(os.getenv("WEB_CONCURRENCY", str(cpu_count * 2 + 1 if shared_cache else 1)))
+threads = int(os.getenv("GUNICORN_THREADS", str(cpu_count * 2)))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+
+# Import Django once in the master and fork it, instead of once per worker
+preload_app = os.getenv("GUNICORN_PRELOAD", "1").lower() in ("1", "true", "yes")
+
+# Recycle workers to bound memory growth; jitter keeps them from restarting together
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", str(max_requests // 10)))
 
-workers = 1
-threads = 2
 bind = "0.0.0.0:" + os.getenv("PORT", "10000")
-timeout = 120
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
 accesslog = "-"
 errorlog = "-"
-loglevel = "info"
\ No newline at end of file
+loglevel = "info"
+
+
+def when_ready(server):
+    if workers > 1 and not shared_cache:
+        server.log.warning(
+            "Startup: %s workers with CACHE_BACKEND=locmem; logouts and cache invalidation "
+            "only reach the worker that served them. Set CACHE_BACKEND to file or redis.", workers,
+        )
+    server.log.info(
+        "Startup: master ready in %.3fs (%s, %s x %s, preload=%s)",
+        time.monotonic() - started_at, worker_class, workers, threads, preload_app,
+    )
+
+
+def pre_fork(server, worker):
+    # Connections opened while preloading would be shared by every child; drop them first
+    if preload_app:
+        from django.core.cache import caches
+        from django.db import connections
+        connections.close_all()
+        caches.close_all()
+    worker.forked_at = time.monotonic()
+
+
+def post_worker_init(worker):
+    worker.log.info(
+        "Startup: worker %s booted in %.3fs", worker.pid, time.monotonic() - worker.forked_at
+    )
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.forms.models import model_to_dict
+from django.http import HttpResponse, JsonResponse, QueryDict
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition, require_http_methods
+
+from .forms import TaskForm
+from .fragments import GLOBAL_SCOPE, current_version
+from .models import Task, UserProfile
+from .pagination import get_page_size, paginate_tasks
+from .transfer import TRUE_VALUES
+from .views import filter_archived_tasks, filter_tasks
+
+
+def api_login_required(view):
+    """Like login_required, but answers with JSON 401/403 instead of redirecting."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({"error": "Authentication required."}, status=401)
+        try:
+            request.user.userprofile
+        except UserProfile.DoesNotExist:
+            return JsonResponse({"error": "User profile not found."}, status=403)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def is_admin(request):
+    return request.user.userprofile.role == "admin" or request.user.is_superuser
+
+
+def task_stamp(request):
+    """
+    ``(version, changed_at)`` for the tasks visible to the requester: their own
+    profile's stamp, or for admins the dashboard's global version token, which
+    every task change bumps. That token carries no time, so admins get no
+    Last-Modified, and like the cached dashboard fragments it expires after
+    DASHBOARD_CACHE_TIMEOUT, in case a writer used a cache this process can't see.
+    """
+    if not hasattr(request, '_task_stamp'):
+        if is_admin(request):
+            version = f"all:{current_version(GLOBAL_SCOPE)}:{int(time.time() // settings.DASHBOARD_CACHE_TIMEOUT)}"
+            changed_at = None
+        else:
+            profile = request.user.userprofile
+            version = f"{request.user.pk}:{profile.task_version}"
+            changed_at = profile.tasks_changed_at
+        request._task_stamp = (version, changed_at)
+    return request._task_stamp
+
+
+def task_etag(request, *args, **kwargs):
+    if not request.user.is_authenticated:
+        return None
+    version, changed_at = task_stamp(request)
+    raw = f"{version}:{changed_at}:{request.get_full_path()}"
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def task_last_modified(request, *args, **kwargs):
+    if not request.user.is_authenticated:
+        return None
+    return task_stamp(request)[1]
+
+
+def serialize_task(task):
+    return {
+        "id": task.id,
+        "user": task.user_id,
+        "title": task.title,
+        "description": task.description,
+        "is_completed": task.is_completed,
+        "created_at": task.created_at.isoformat(),
+        "due_date": task.due_date.isoformat() if task.due_date else None,
+        "archived": task.is_archived,
+    }
+
+
+class UnsupportedMediaType(ValueError):
+    pass
+
+
+def request_data(request):
+    """
+    The request body as a dict-like object. Django only parses form bodies of
+    POSTs, so a form-encoded PUT or PATCH is parsed here; other bodies are refused
+    rather than read as "no changes".
+    """
+    if request.content_type == 'application/json':
+        data = json.loads(request.body or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError
+        return data
+    if request.method == 'POST':
+        return request.POST
+    if request.content_type == 'application/x-www-form-urlencoded' or not request.body:
+        return QueryDict(request.body, encoding=request.encoding).dict()
+    raise UnsupportedMediaType
+
+
+def body_error(error):
+    if isinstance(error, UnsupportedMediaType):
+        return JsonResponse({"error": "Send the body as JSON or form-encoded data."}, status=415)
+    return JsonResponse({"error": "Request body must be a JSON object."}, status=400)
+
+
+def visible_tasks(request):
+    return Task.objects.all() if is_admin(request) else Task.objects.filter(user=request.user)
+
+
+def save_task_form(form, status=200):
+    if not form.is_valid():
+        return JsonResponse({"error": "Invalid task data.", "fields": form.errors}, status=400)
+    task = form.save()
+    return JsonResponse(serialize_task(task), status=status)
+
+
+# API: List / Create Tasks
+@api_login_required
+@require_http_methods(["GET", "HEAD", "POST"])
+@condition(etag_func=task_etag, last_modified_func=task_last_modified)
+def task_list(request):
+    if request.method == "POST":
+        try:
+            data = request_data(request)
+        except ValueError as error:
+            return body_error(error)
+        form = TaskForm(data)
+        form.instance.user = request.user
+        return save_task_form(form, status=201)
+
+    filters = (request.user, is_admin(request), request.GET.get('q', ''), request.GET.get('status', 'all'))
+    tasks = filter_tasks(*filters)
+    archived = filter_archived_tasks(*filters) if request.GET.get('archived') == '1' else None
+    page, next_cursor = paginate_tasks(tasks, request.GET.get('cursor'), get_page_size(request), archived)
+    return JsonResponse({
+        "results": [serialize_task(task) for task in page],
+        "next_cursor": next_cursor,
+    })
+
+
+# API: Retrieve / Update / Delete Task
+@api_login_required
+@require_http_methods(["GET", "HEAD", "PUT", "PATCH", "DELETE"])
+@condition(etag_func=task_etag, last_modified_func=task_last_modified)
+def task_detail(request, task_id):
+    task = get_object_or_404(visible_tasks(request), id=task_id)
+
+    if request.method == "DELETE":
+        task.delete()
+        return HttpResponse(status=204)
+
+    if request.method in ("PUT", "PATCH"):
+        try:
+            data = request_data(request)
+        except ValueError as error:
+            return body_error(error)
+        if request.method == "PATCH":
+            # Fields the body leaves out keep their current values
+            data = {**model_to_dict(task, fields=TaskForm.Meta.fields), **data}
+        form = TaskForm(data, instance=task)
+        if 'is_completed' in data:
+            value = data['is_completed']
+            task.is_completed = value if isinstance(value, bool) else str(value).lower() in TRUE_VALUES
+        return save_task_form(form)
+
+    return JsonResponse(serialize_task(task))
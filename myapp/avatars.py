@@ -0,0 +1,152 @@
+import hashlib
+import io
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .fragments import invalidate_dashboard
+from .jobs import enqueue
+from .models import UserProfile
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+# Derivative formats: extension -> Pillow save options
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpg': {'format': 'JPEG', 'quality': 85, 'optimize': True, 'progressive': True},
+}
+
+# Where process_avatar stores the sanitized upload; group 1 is the content hash
+PROCESSED_NAME = re.compile(r'avatars/([0-9a-f]{16})/original\.jpg')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def validate_avatar(upload):
+    """Reject files that are too big, aren't images Pillow can read, or decode to too many pixels."""
+    if upload.size > settings.AVATAR_MAX_UPLOAD_BYTES:
+        raise ValidationError(f"Avatar must be under {filesizeformat(settings.AVATAR_MAX_UPLOAD_BYTES)}.")
+    try:
+        with Image.open(upload) as image:
+            if image.format not in ALLOWED_FORMATS:
+                raise ValidationError("Avatar must be a JPEG, PNG, WebP or GIF image.")
+            if image.width * image.height > settings.AVATAR_MAX_PIXELS:
+                raise ValidationError("Avatar dimensions are too large.")
+            image.verify()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise ValidationError("Upload a valid image.")
+    finally:
+        upload.seek(0)
+
+
+def derivative_name(digest, size, ext):
+    return f'avatars/{digest}/{size}.{ext}'
+
+
+def encode(image, ext):
+    buffer = io.BytesIO()
+    # Saving without exif/icc arguments writes no metadata
+    image.save(buffer, **FORMATS[ext])
+    return buffer.getvalue()
+
+
+def flatten(image):
+    """Orient by EXIF, then drop to RGB over white so every format can take it."""
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def process_avatar(profile_id, force=False):
+    """
+    Replace a profile's uploaded avatar with a metadata-free copy capped at
+    AVATAR_MAX_DIMENSION, and write square WebP and JPEG thumbnails in each
+    of AVATAR_SIZES. Files are named after a hash of the uploaded bytes, so
+    their URLs never change content and can be cached forever. ``force``
+    rewrites the thumbnails of an already processed avatar.
+    Returns the hash, or None if there was nothing to do.
+    """
+    profile = UserProfile.objects.filter(pk=profile_id).only('avatar', 'avatar_hash', 'user_id').first()
+    if profile is None or not profile.avatar:
+        return None
+    uploaded_name = profile.avatar.name
+
+    processed = PROCESSED_NAME.fullmatch(uploaded_name)
+    if profile.avatar_hash and processed and not force:
+        return profile.avatar_hash
+    with default_storage.open(uploaded_name, 'rb') as handle:
+        raw = handle.read()
+    # A processed original keeps its hash, so reprocessing doesn't re-encode it
+    digest = processed[1] if processed else hashlib.sha256(raw).hexdigest()[:16]
+    sanitized = derivative_name(digest, 'original', 'jpg')
+
+    with Image.open(io.BytesIO(raw)) as source:
+        image = flatten(source)
+    files = {}
+    if not processed:
+        original = image.copy()
+        original.thumbnail((settings.AVATAR_MAX_DIMENSION,) * 2, Image.LANCZOS)
+        files[sanitized] = encode(original, 'jpg')
+    for size in settings.AVATAR_SIZES:
+        thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        for ext in FORMATS:
+            files[derivative_name(digest, size, ext)] = encode(thumbnail, ext)
+    for name, content in files.items():
+        if force and name != sanitized:
+            default_storage.delete(name)
+        if not default_storage.exists(name):
+            default_storage.save(name, ContentFile(content))
+
+    # Only swap in the processed copy if no newer upload replaced the avatar meanwhile
+    updated = UserProfile.objects.filter(pk=profile_id, avatar=uploaded_name).update(
+        avatar=sanitized, avatar_hash=digest
+    )
+    if updated:
+        if uploaded_name != sanitized:
+            default_storage.delete(uploaded_name)
+        invalidate_dashboard(profile.user_id)
+    return digest
+
+
+def _process_in_thread(profile_id):
+    try:
+        process_avatar(profile_id)
+    except Exception:
+        logger.exception("Avatar processing failed for profile %s", profile_id)
+    finally:
+        # Pool threads outlive the request cycle that would otherwise close their connections
+        connections.close_all()
+
+
+def get_executor():
+    # Created on first use, so each gunicorn worker gets its own threads after the fork
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(settings.AVATAR_WORKERS, thread_name_prefix='avatar')
+        return _executor
+
+
+def schedule_avatar_processing(profile_id):
+    """Process the avatar off the request thread once the upload is committed."""
+    if settings.AVATAR_PROCESSING == 'sync':
+        transaction.on_commit(lambda: process_avatar(profile_id))
+    elif settings.AVATAR_PROCESSING == 'queue':
+        enqueue('process_avatar', key=str(profile_id), profile_id=profile_id)
+    else:
+        transaction.on_commit(lambda: get_executor().submit(_process_in_thread, profile_id))
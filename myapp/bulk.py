@@ -0,0 +1,65 @@
+from collections import Counter
+
+from django.db import transaction
+
+from .fragments import invalidate_dashboard
+from .live import publish_refresh
+from .models import Task, TaskEvent, UserProfile, batch_task_changes
+
+BULK_ACTIONS = ('complete', 'delete', 'edit')
+
+
+def run_bulk_action(action, tasks, ids=None, changes=None, limit=1000):
+    """
+    Apply ``action`` to up to ``limit`` rows of ``tasks`` in one transaction.
+
+    ``tasks`` must already be narrowed to what the requester may touch. When
+    ``ids`` is given, only those tasks are considered and ids outside the
+    queryset are reported as ``not_found``. Returns ``(results, more)`` where
+    ``results`` maps task id to outcome and ``more`` says the limit was hit.
+    """
+    if ids is not None:
+        tasks = tasks.filter(id__in=ids)
+
+    with transaction.atomic(using=tasks.db), batch_task_changes():
+        rows = list(tasks.select_for_update().values_list('id', 'user_id', 'is_completed', 'title')[:limit + 1])
+        more, rows = len(rows) > limit, rows[:limit]
+        results = {task_id: 'not_found' for task_id in ids or ()}
+        target_ids = [task_id for task_id, *_ in rows]
+
+        if action == 'delete':
+            Task.objects.filter(id__in=target_ids).delete()
+            results.update((task_id, 'deleted') for task_id in target_ids)
+            return results, more
+
+        if action == 'complete':
+            changes = {'is_completed': True}
+        # Every owner gets a version bump; only rows whose status flips move the counters
+        flipped = Counter()
+        if 'is_completed' in changes:
+            flipped.update(user_id for _, user_id, is_completed, _ in rows if is_completed != changes['is_completed'])
+        delta = 1 if changes.get('is_completed') else -1
+        for user_id in {user_id for _, user_id, *_ in rows}:
+            if action == 'edit' or flipped[user_id]:
+                UserProfile.record_task_change(user_id, completed=delta * flipped[user_id])
+
+        if action == 'complete':
+            pending_ids = [task_id for task_id, _, is_completed, _ in rows if not is_completed]
+            Task.objects.filter(id__in=pending_ids).update(is_completed=True)
+            results.update((task_id, 'completed' if not is_completed else 'already_completed')
+                           for task_id, _, is_completed, _ in rows)
+        else:
+            Task.objects.filter(id__in=target_ids).update(**changes)
+            results.update((task_id, 'updated') for task_id in target_ids)
+        # update() skips the Task signals that normally invalidate the dashboard and publish live events
+        for task_id, user_id, is_completed, title in rows:
+            if 'is_completed' in changes and is_completed != changes['is_completed']:
+                event = 'completed' if changes['is_completed'] else 'reopened'
+            elif action == 'edit':
+                event = 'updated'
+            else:
+                continue
+            TaskEvent.record(event, Task(id=task_id, user_id=user_id, title=changes.get('title', title)))
+        invalidate_dashboard(*{user_id for _, user_id, *_ in rows})
+        publish_refresh({user_id for _, user_id, *_ in rows})
+    return results, more
@@ -1,6 +1,8 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+from django.core.files.uploadedfile import UploadedFile
+from myapp.avatars import validate_avatar
 from myapp.models import UserProfile, Task
 
 class RegisterForm(UserCreationForm):
@@ -27,6 +29,13 @@ class UserProfileForm(forms.ModelForm):
             raise forms.ValidationError("Name must be at least 3 characters long.")
         return name
 
+    def clean_avatar(self):
+        avatar = self.cleaned_data.get('avatar')
+        # Only new uploads need checking; an unchanged field holds the stored file
+        if isinstance(avatar, UploadedFile):
+            validate_avatar(avatar)
+        return avatar
+
 class TaskForm(forms.ModelForm):
     due_date = forms.DateTimeField(
         widget=forms.DateTimeInput(attrs={'type': 'datetime-local'}),
@@ -35,4 +44,20 @@ class TaskForm(forms.ModelForm):
 
     class Meta:
         model = Task
-        fields = ['title', 'description', 'due_date']
\ No newline at end of file
+        fields = ['title', 'description', 'due_date']
+
+class BulkTaskEditForm(forms.ModelForm):
+    """Field rules for bulk edits; only the fields actually submitted are applied."""
+
+    class Meta:
+        model = Task
+        fields = ['title', 'description', 'is_completed']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in list(self.fields):
+            if name not in self.data:
+                del self.fields[name]
+
+    def changes(self):
+        return {name: self.cleaned_data[name] for name in self.fields}
@@ -0,0 +1,95 @@
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import DUE_FILTERS
+
+# Admin fragments span every user, so they share one global version
+GLOBAL_SCOPE = 'all'
+
+
+def version_key(scope):
+    return f'dashboard:version:{scope}'
+
+
+def fragment_key(name, scope, *params):
+    digest = hashlib.md5('\x1f'.join(map(str, params)).encode(), usedforsecurity=False).hexdigest()
+    return f'dashboard:{name}:{scope}:{digest}'
+
+
+def bump_dashboard_versions(user_ids):
+    """Give each user, and the global admin scope, a fresh version token."""
+    # Tokens never repeat, so an evicted and re-created version can't revive stale fragments
+    token = uuid.uuid4().hex
+    keys = {version_key(user_id): token for user_id in user_ids}
+    keys[version_key(GLOBAL_SCOPE)] = token
+    cache.set_many(keys, timeout=None)
+
+
+def invalidate_dashboard(*user_ids):
+    """
+    Bump now so this request sees its own change, and again on commit so a
+    dashboard rendered from pre-commit data in the meantime doesn't stick.
+    """
+    bump_dashboard_versions(user_ids)
+    transaction.on_commit(lambda: bump_dashboard_versions(user_ids))
+
+
+def current_version(scope):
+    """The scope's version token, starting a new one if it was evicted."""
+    key = version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def dashboard_fragment_keys(scope, task_query='', status='all', user_query='', archived=False):
+    """Cache keys for the dashboard fragments visible to ``scope``."""
+    keys = {
+        # Overdue and due-soon counts move with the clock, so those keys roll over every minute
+        'stats': fragment_key(
+            'stats', scope, task_query, status, archived, int(time.time() // 60) if status in DUE_FILTERS else ''
+        ),
+        # The activity feed ignores the dashboard filters, so one entry serves every view
+        'activity': fragment_key('activity', scope),
+        # Presence moves with time rather than writes, so it rolls over to a new key instead
+        'online': fragment_key('online', scope, int(time.time() // settings.DASHBOARD_ONLINE_CACHE_SECONDS)),
+    }
+    if scope == GLOBAL_SCOPE:
+        keys['user_table'] = fragment_key('user_table', scope, user_query)
+    return keys
+
+
+async def aread_fragments(scope, keys):
+    """
+    Fetch the scope's version and every fragment in ``keys`` with one cache
+    read. Returns ``(version, fragments)``; fragments stored under an older
+    version are left out.
+    """
+    current = version_key(scope)
+    found = await cache.aget_many([current, *keys.values()])
+    version = found.get(current)
+    if version is None:
+        version = uuid.uuid4().hex
+        await cache.aadd(current, version, timeout=None)
+        return version, {}
+    fragments = {}
+    for name, key in keys.items():
+        entry = found.get(key)
+        if entry is not None and entry[0] == version:
+            fragments[name] = entry[1]
+    return version, fragments
+
+
+async def awrite_fragments(version, keys, fragments):
+    if fragments:
+        await cache.aset_many(
+            {keys[name]: (version, value) for name, value in fragments.items()},
+            timeout=settings.DASHBOARD_CACHE_TIMEOUT,
+        )
@@ -0,0 +1,20 @@
+"""
+Django's password hashers with their cost parameters read from settings, so
+login CPU cost can be tuned per deployment (see benchmarks/hashers.py).
+Algorithm names are unchanged, so existing hashes keep verifying and are
+re-hashed with the new parameters on the user's next login.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    def __init__(self):
+        self.iterations = settings.PASSWORD_PBKDF2_ITERATIONS or hashers.PBKDF2PasswordHasher.iterations
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    def __init__(self):
+        self.time_cost = settings.PASSWORD_ARGON2_TIME_COST
+        self.memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+        self.parallelism = settings.PASSWORD_ARGON2_PARALLELISM
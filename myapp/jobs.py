@@ -0,0 +1,147 @@
+import io
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils.timezone import now
+
+from .models import Job, Task, TaskArchive, TaskEvent, purge_user_rows
+
+logger = logging.getLogger(__name__)
+
+# Job name -> handler, filled by @register
+JOBS = {}
+
+
+def register(name):
+    """
+    Register the decorated function as the handler for job ``name``. A job can
+    run more than once: after a failed attempt, or when it outlives
+    JOBS_LOCK_TIMEOUT and is requeued while its first run is still going. So
+    handlers must be idempotent, and safe to overlap with another run.
+    """
+    def decorator(handler):
+        JOBS[name] = handler
+        return handler
+    return decorator
+
+
+def enqueue(name, key='', delay=0, **payload):
+    """
+    Queue ``JOBS[name](**payload)`` for ``manage.py run_jobs``. The row is
+    written in the caller's transaction, so the job only becomes visible if
+    that commits. With a ``key``, a matching job still waiting absorbs this
+    one. With JOBS_EAGER the handler runs in-process on commit instead.
+    """
+    if name not in JOBS:
+        raise KeyError(f"Unknown job: {name}")
+    if settings.JOBS_EAGER:
+        transaction.on_commit(lambda: JOBS[name](**payload))
+        return None
+    if key and Job.objects.filter(name=name, key=key, status='queued').exists():
+        return None
+    return Job.objects.create(
+        name=name, key=key, payload=payload, max_attempts=settings.JOBS_MAX_ATTEMPTS,
+        run_at=now() + timedelta(seconds=delay),
+    )
+
+
+def claim_jobs(worker, limit):
+    """
+    Mark up to ``limit`` due jobs as running for ``worker`` and return them.
+    Each claim is a conditional UPDATE, so two workers never get the same job.
+    """
+    claimed = []
+    due = Job.objects.filter(status='queued', run_at__lte=now()).order_by('run_at', 'pk')
+    for pk in due.values_list('pk', flat=True)[:limit * 2]:
+        if Job.objects.filter(pk=pk, status='queued').update(
+            status='running', locked_by=worker, locked_at=now(), attempts=F('attempts') + 1,
+        ):
+            claimed.append(pk)
+            if len(claimed) == limit:
+                break
+    return list(Job.objects.filter(pk__in=claimed).order_by('run_at', 'pk'))
+
+
+def run_job(job):
+    """
+    Run a claimed job; failures are retried with exponential backoff until
+    max_attempts. The outcome is only recorded while this run still holds the
+    claim: a job requeued by requeue_stale_jobs() and claimed again belongs to
+    its new run, which records its own.
+    """
+    # A claim is the worker and the time it took the job; a new claim changes locked_at
+    claim = Job.objects.filter(pk=job.pk, status='running', locked_by=job.locked_by, locked_at=job.locked_at)
+    try:
+        JOBS[job.name](**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            retry_at = now() + timedelta(seconds=settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1))
+            if claim.update(status='queued', run_at=retry_at, last_error=error):
+                logger.warning("Job %s failed (attempt %s), retrying at %s", job, job.attempts, retry_at)
+        elif claim.update(status='failed', finished_at=now(), last_error=error):
+            logger.error("Job %s failed permanently:\n%s", job, error)
+        else:
+            logger.warning("Job %s failed after losing its claim:\n%s", job, error)
+        return False
+    if not claim.update(status='done', finished_at=now()):
+        logger.warning("Job %s finished after losing its claim; its current run records the outcome", job)
+    return True
+
+
+def run_job_in_thread(job):
+    try:
+        return run_job(job)
+    finally:
+        connections.close_all()
+
+
+def requeue_stale_jobs():
+    """
+    Put back jobs whose worker died mid-run, or is still running them after
+    JOBS_LOCK_TIMEOUT; they count as a failed attempt.
+    """
+    cutoff = now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    return Job.objects.filter(status='running', locked_at__lt=cutoff).update(status='queued', run_at=now())
+
+
+def purge_finished_jobs():
+    cutoff = now() - timedelta(seconds=settings.JOBS_RETENTION_SECONDS)
+    return Job.objects.filter(status__in=['done', 'failed'], finished_at__lt=cutoff).delete()[0]
+
+
+@register('delete_user')
+def delete_user(user_id):
+    """
+    Delete a user's tasks, archived tasks and activity events in batches, then
+    the user, so no single transaction holds the lock for long. A second run
+    just finds less, or nothing, left to delete.
+    """
+    with purge_user_rows():
+        for model in (Task, TaskArchive, TaskEvent):
+            rows = model.objects.filter(user_id=user_id)
+            while pks := list(rows.values_list('pk', flat=True)[:settings.JOBS_DELETE_BATCH_SIZE]):
+                with transaction.atomic():
+                    model.objects.filter(pk__in=pks).delete()
+    User.objects.filter(pk=user_id).delete()
+
+
+@register('rebuild_task_counters')
+def rebuild_task_counters():
+    """Recount every profile's tasks from scratch; the last run to finish wins."""
+    out = io.StringIO()
+    call_command('rebuild_task_counters', stdout=out)
+    logger.info(out.getvalue().strip())
+
+
+@register('process_avatar')
+def process_avatar(profile_id):
+    """Re-encode an uploaded avatar; an avatar that is already processed is left alone."""
+    from .avatars import process_avatar
+    process_avatar(profile_id)
@@ -0,0 +1,238 @@
+"""
+Live task events for the dashboard, sent as server-sent events.
+
+Task signals publish small JSON deltas to a per-owner channel and to the
+admins' channel; /tasks/events/ streams the viewer's channel. The broker is
+LIVE_EVENTS_BACKEND: InProcessBroker reaches clients on the same worker
+process, RedisBroker reaches every worker through Redis pub/sub.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .fragments import GLOBAL_SCOPE
+from .streaming import streaming_response
+
+# Sent instead of the backlog to a client too far behind; the page reloads
+REFRESH = {'type': 'refresh'}
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def channel_for(scope):
+    return f'tasks:{scope}'
+
+
+class Subscription:
+    """
+    Pending events for one client. ``put`` may be called from any thread;
+    the stream reads with ``get`` (WSGI) or ``aget`` (ASGI).
+    """
+
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = channels
+        self.events = deque()
+        self.overflowed = False
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.loop = None
+        self.aready = None
+
+    def put(self, event):
+        with self.lock:
+            if len(self.events) >= settings.LIVE_EVENTS_QUEUE_SIZE:
+                self.events.clear()
+                self.overflowed = True
+            else:
+                self.events.append(event)
+            loop = self.loop
+        self.ready.set()
+        if loop:
+            loop.call_soon_threadsafe(self.aready.set)
+
+    def drain(self):
+        with self.lock:
+            events = [REFRESH] if self.overflowed else list(self.events)
+            self.events.clear()
+            self.overflowed = False
+            self.ready.clear()
+            if self.aready:
+                self.aready.clear()
+        return events
+
+    def get(self, timeout):
+        self.ready.wait(timeout)
+        return self.drain()
+
+    async def aget(self, timeout):
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.get_running_loop()
+                self.aready = asyncio.Event()
+            pending = bool(self.events) or self.overflowed
+        if not pending:
+            try:
+                await asyncio.wait_for(self.aready.wait(), timeout)
+            except TimeoutError:
+                pass
+        return self.drain()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Delivers events to subscribers in this process only; fine for a single worker."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels)
+        with self.lock:
+            for channel in channels:
+                self.subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                self.subscribers[channel].discard(subscription)
+                if not self.subscribers[channel]:
+                    del self.subscribers[channel]
+
+    def publish(self, channel, event):
+        self.deliver(channel, event)
+
+    def deliver(self, channel, event):
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Publishes through Redis so clients on every worker see every event
+    (pip install redis). Each process listens on one pattern subscription,
+    started on its first client, and fans events out locally.
+    """
+    prefix = 'tasksync:'
+
+    def __init__(self):
+        super().__init__()
+        import redis
+        self.redis = redis.Redis.from_url(settings.LIVE_EVENTS_REDIS_URL)
+        self.listener = None
+
+    def subscribe(self, channels):
+        with self.lock:
+            if self.listener is None:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(**{f'{self.prefix}*': self.on_message})
+                self.listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+        return super().subscribe(channels)
+
+    def publish(self, channel, event):
+        self.redis.publish(f'{self.prefix}{channel}', json.dumps(event))
+
+    def on_message(self, message):
+        self.deliver(message['channel'].decode().removeprefix(self.prefix), json.loads(message['data']))
+
+
+def get_broker():
+    # Created on first use, so each gunicorn worker gets its own after the fork
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.LIVE_EVENTS_BACKEND)()
+        return _broker
+
+
+def task_data(task):
+    return {
+        'id': task.pk,
+        'title': task.title,
+        'description': task.description,
+        'is_completed': task.is_completed,
+        'created_at': task.created_at.isoformat() if task.created_at else None,
+        'due_date': task.due_date.isoformat() if task.due_date else None,
+    }
+
+
+def publish(user_ids, event):
+    """Send ``event`` to each owner's channel and the admins' channel once the transaction commits."""
+    if not settings.LIVE_EVENTS:
+        return
+    channels = [channel_for(user_id) for user_id in user_ids] + [channel_for(GLOBAL_SCOPE)]
+
+    def send():
+        broker = get_broker()
+        for channel in channels:
+            broker.publish(channel, event)
+    transaction.on_commit(send)
+
+
+def publish_task_change(action, task, user_id, total=0, completed=0):
+    """``action`` is created, updated or deleted; ``total``/``completed`` are the owner's counter deltas."""
+    publish([user_id], {
+        'type': 'task',
+        'action': action,
+        'task': task_data(task),
+        'delta': {'total': total, 'completed': completed},
+    })
+
+
+def publish_refresh(user_ids):
+    """For bulk writes too large to describe as deltas: viewers reload instead."""
+    publish(user_ids, REFRESH)
+
+
+def format_event(event):
+    return f'data: {json.dumps(event)}\n\n'
+
+
+def event_stream(request, channels, initial):
+    """
+    A text/event-stream of ``initial`` followed by everything published to
+    ``channels``, with keep-alive comments. The stream ends after
+    LIVE_EVENTS_MAX_SECONDS and the browser reconnects, getting fresh stats.
+    """
+    subscription = get_broker().subscribe(channels)
+    keepalive = settings.LIVE_EVENTS_KEEPALIVE_SECONDS
+    deadline = time.monotonic() + settings.LIVE_EVENTS_MAX_SECONDS
+    head = f'retry: {settings.LIVE_EVENTS_RETRY_MS}\n\n' + format_event(initial)
+
+    def chunk(events):
+        return ''.join(map(format_event, events)) or ': keepalive\n\n'
+
+    def generate():
+        try:
+            yield head
+            while time.monotonic() < deadline:
+                yield chunk(subscription.get(keepalive))
+        finally:
+            subscription.close()
+
+    async def agenerate():
+        try:
+            yield head
+            while time.monotonic() < deadline:
+                yield chunk(await subscription.aget(keepalive))
+        finally:
+            subscription.close()
+
+    response = streaming_response(request, generate, agenerate, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
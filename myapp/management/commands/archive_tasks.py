@@ -0,0 +1,48 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.timezone import now
+
+from myapp.fragments import invalidate_dashboard
+from myapp.models import Task, TaskArchive, UserProfile, batch_task_changes
+
+
+class Command(BaseCommand):
+    help = "Move completed tasks older than a cutoff into the archive table, in short batched transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.TASK_ARCHIVE_AFTER_DAYS,
+                            help="Archive completed tasks created more than this many days ago.")
+        parser.add_argument('--batch-size', type=int, default=settings.TASK_ARCHIVE_BATCH_SIZE,
+                            help="Tasks moved per transaction, to keep write locks short.")
+        parser.add_argument('--pause', type=float, default=0,
+                            help="Seconds to sleep between batches, leaving room for other writers.")
+        parser.add_argument('--interval', type=int, default=0,
+                            help="Seconds between runs; 0 archives once and exits.")
+
+    def handle(self, *args, **options):
+        while True:
+            moved = self.archive(options['days'], options['batch_size'], options['pause'])
+            self.stdout.write(f"Archived {moved} task(s).")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def archive(self, days, batch_size, pause):
+        old = Task.objects.filter(is_completed=True, created_at__lt=now() - timedelta(days=days))
+        moved = 0
+        while ids := list(old.order_by('created_at', 'id').values_list('id', flat=True)[:batch_size]):
+            with transaction.atomic(), batch_task_changes():
+                archived, user_ids = TaskArchive.archive(ids)
+                # The counters keep counting archived tasks; the version bump still
+                # invalidates API ETags and cached search stats over the hot table
+                for user_id in user_ids:
+                    UserProfile.record_task_change(user_id)
+            invalidate_dashboard(*user_ids)
+            moved += archived
+            if pause:
+                time.sleep(pause)
+        return moved
@@ -0,0 +1,54 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+from django.utils.timezone import now
+
+from myapp.models import TaskEvent
+
+
+class Command(BaseCommand):
+    help = "Trim the task activity log to a retention window and a per-user cap, in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.TASK_EVENTS_RETENTION_DAYS,
+                            help="Delete events older than this many days; 0 keeps them regardless of age.")
+        parser.add_argument('--keep-per-user', type=int, default=settings.TASK_EVENTS_PER_USER,
+                            help="Keep at most this many of each user's newest events; 0 for no cap.")
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Events deleted per statement, to keep write locks short.")
+        parser.add_argument('--interval', type=int, default=0,
+                            help="Seconds between compactions; 0 compacts once and exits.")
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = self.compact(options['days'], options['keep_per_user'], options['batch_size'])
+            self.stdout.write(f"Removed {deleted} task event(s).")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def compact(self, days, keep_per_user, batch_size):
+        deleted = 0
+        if days:
+            deleted += self.delete_batched(TaskEvent.objects.filter(timestamp__lt=now() - timedelta(days=days)), batch_size)
+        if keep_per_user:
+            crowded = (
+                TaskEvent.objects.values('user').annotate(events=Count('id'))
+                .filter(events__gt=keep_per_user).values_list('user', flat=True)
+            )
+            for user_id in crowded:
+                events = TaskEvent.objects.filter(user_id=user_id)
+                # The oldest event still kept; everything before it in feed order goes
+                timestamp, event_id = events.order_by('-timestamp', '-id').values_list('timestamp', 'id')[keep_per_user - 1]
+                older = events.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=event_id))
+                deleted += self.delete_batched(older, batch_size)
+        return deleted
+
+    def delete_batched(self, events, batch_size):
+        deleted = 0
+        while ids := list(events.values_list('id', flat=True)[:batch_size]):
+            deleted += TaskEvent.objects.filter(id__in=ids).delete()[0]
+        return deleted
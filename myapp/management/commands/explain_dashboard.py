@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils.timezone import now
+
+from myapp.models import UserPresence, UserProfile
+from myapp.pagination import keyset_filter
+from myapp.views import activity_events, filter_tasks
+
+
+class Command(BaseCommand):
+    help = "Print the query plans behind the dashboard so index usage can be checked."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help="User whose dashboard queries are explained.")
+        parser.add_argument('--search', default='report', help="Search term for the task_query plans.")
+        parser.add_argument('--user-query', default='a', help="Name fragment for the admin user search plan.")
+        parser.add_argument('--analyze', action='store_true',
+                            help="Run EXPLAIN ANALYZE (Postgres only; executes the queries).")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.select_related('userprofile').get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}.")
+        is_admin = user.userprofile.role == 'admin' or user.is_superuser
+        explain_options = {'analyze': True} if options['analyze'] and connection.vendor == 'postgresql' else {}
+
+        plans = []
+        for status in ('all', 'pending', 'completed', 'overdue', 'due_soon'):
+            page = keyset_filter(filter_tasks(user, is_admin, '', status))[:50]
+            plans.append((f"task page, status={status}", page))
+        plans.append(("task page, search", filter_tasks(user, is_admin, options['search'])[:50]))
+        plans.append(("recent activity", activity_events(user, is_admin)[:5]))
+        plans.append(("users online", UserPresence.objects.filter(
+            last_seen__gte=now() - timedelta(seconds=settings.PRESENCE_WINDOW_SECONDS))))
+        if is_admin:
+            plans.append(("admin user search", UserProfile.objects.select_related('user').filter(
+                name__icontains=options['user_query'])))
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Database vendor: {connection.vendor}"))
+        for label, queryset in plans:
+            self.stdout.write(self.style.MIGRATE_LABEL(f"\n{label}"))
+            self.stdout.write(queryset.explain(**explain_options))
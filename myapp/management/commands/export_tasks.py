@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from myapp.models import Task
+from myapp.transfer import FORMATS, export_tasks, guess_format
+
+
+class Command(BaseCommand):
+    help = "Stream tasks out as CSV or JSONL with constant memory. Archived tasks are not included."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help="File to write; defaults to stdout.")
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the output extension, else csv.")
+        parser.add_argument('--user', help="Only export this username's tasks.")
+        parser.add_argument('--chunk-size', type=int, default=settings.TASK_EXPORT_CHUNK_SIZE,
+                            help="Rows fetched per query.")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or guess_format(options['output'] or '')
+        tasks = Task.objects.all()
+        if options['user']:
+            tasks = tasks.filter(user__username=options['user'])
+
+        lines = export_tasks(tasks, fmt, options['chunk_size'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+            output.writelines(lines)
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.transfer import FORMATS, check_utf8, guess_format, import_tasks, read_records
+
+
+class Command(BaseCommand):
+    help = "Bulk-import tasks from CSV or JSONL, validating each row with the TaskForm rules."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSONL file to import.")
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension, else csv.")
+        parser.add_argument('--user', help="Owner for rows without a username column.")
+        parser.add_argument('--chunk-size', type=int, default=settings.TASK_IMPORT_CHUNK_SIZE,
+                            help="Rows per bulk INSERT.")
+
+    def handle(self, *args, **options):
+        default_user = None
+        if options['user']:
+            try:
+                default_user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {options['user']!r}.")
+
+        fmt = options['format'] or guess_format(options['path'])
+        with open(options['path'], 'rb') as raw:
+            try:
+                check_utf8(iter(lambda: raw.read(64 * 1024), b''))
+            except UnicodeDecodeError as error:
+                raise CommandError(f"{options['path']} is not UTF-8 text: {error}")
+        with open(options['path'], encoding='utf-8-sig', newline='') as lines:
+            created, errors = import_tasks(
+                read_records(lines, fmt), default_user=default_user, chunk_size=options['chunk_size']
+            )
+
+        for number, problems in errors:
+            self.stderr.write(f"line {number}: {'; '.join(problems)}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {created} task(s), skipped {len(errors)} invalid row(s)."))
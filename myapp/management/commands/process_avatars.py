@@ -0,0 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from myapp.avatars import process_avatar
+from myapp.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = "Generate thumbnails for uploaded avatars that haven't been processed yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help="Reprocess every avatar, e.g. after changing AVATAR_SIZES.")
+        parser.add_argument('--workers', type=int, default=1,
+                            help="Avatars processed in parallel.")
+
+    def handle(self, *args, **options):
+        profiles = UserProfile.objects.exclude(avatar='').exclude(avatar__isnull=True)
+        if not options['all']:
+            profiles = profiles.filter(avatar_hash='')
+        pks = list(profiles.values_list('pk', flat=True))
+
+        def process(pk):
+            try:
+                return process_avatar(pk, force=options['all'])
+            except Exception as exc:
+                self.stderr.write(f"Profile {pk}: {exc}")
+            finally:
+                if options['workers'] > 1:
+                    connections.close_all()
+
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(options['workers']) as pool:
+                results = list(pool.map(process, pks))
+        else:
+            results = [process(pk) for pk in pks]
+
+        processed = sum(result is not None for result in results)
+        self.stdout.write(self.style.SUCCESS(f"{processed} of {len(pks)} avatar(s) processed."))
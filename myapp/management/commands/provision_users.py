@@ -0,0 +1,40 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.provisioning import password_pool, provision_users
+from myapp.transfer import FORMATS, check_utf8, guess_format, read_records
+
+
+class Command(BaseCommand):
+    help = "Bulk-create user accounts and profiles from CSV or JSONL, hashing passwords in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSONL file with username, email and optionally password, name, role.")
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension, else csv.")
+        parser.add_argument('--chunk-size', type=int, default=settings.USER_PROVISION_CHUNK_SIZE,
+                            help="Accounts per duplicate check, bulk INSERT and transaction.")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Processes hashing passwords; 1 hashes in this process.")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or guess_format(options['path'])
+        with open(options['path'], 'rb') as raw:
+            try:
+                check_utf8(iter(lambda: raw.read(64 * 1024), b''))
+            except UnicodeDecodeError as error:
+                raise CommandError(f"{options['path']} is not UTF-8 text: {error}")
+        executor = password_pool(options['workers'])
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as lines:
+                created, errors = provision_users(
+                    read_records(lines, fmt), chunk_size=options['chunk_size'], executor=executor
+                )
+        finally:
+            if executor:
+                executor.shutdown()
+
+        for number, problems in errors:
+            self.stderr.write(f"line {number}: {'; '.join(problems)}")
+        self.stdout.write(self.style.SUCCESS(f"Created {created} user(s), skipped {len(errors)} invalid row(s)."))
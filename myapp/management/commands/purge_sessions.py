@@ -0,0 +1,34 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+
+class Command(BaseCommand):
+    help = "Delete expired sessions in small batches, optionally repeating on an interval."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Sessions deleted per statement, to keep write locks short.")
+        parser.add_argument('--interval', type=int, default=0,
+                            help="Seconds between purges; 0 purges once and exits.")
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = self.purge(options['batch_size'])
+            self.stdout.write(f"Purged {deleted} expired session(s).")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def purge(self, batch_size):
+        deleted = 0
+        while True:
+            keys = list(
+                Session.objects.filter(expire_date__lt=now())
+                .values_list('session_key', flat=True)[:batch_size]
+            )
+            if not keys:
+                return deleted
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
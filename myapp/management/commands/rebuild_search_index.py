@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from myapp.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text task search index for the active search backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help="Database alias to reindex.")
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(options['database'])
+        backend.reindex(options['database'])
+        self.stdout.write(self.style.SUCCESS(f"Reindexed tasks with {type(backend).__name__}."))
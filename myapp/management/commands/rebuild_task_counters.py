@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from myapp.jobs import enqueue
+from myapp.models import Task, TaskArchive, UserProfile
+
+
+def count_subquery(model, **filters):
+    rows = model.objects.filter(user=OuterRef('user'), **filters).order_by().values('user')
+    return Coalesce(Subquery(rows.annotate(c=Count('pk')).values('c'), output_field=IntegerField()), 0)
+
+
+def actual_task_count(**filters):
+    count = count_subquery(Task, **filters)
+    # Archived tasks are all completed and still count
+    if filters.get('is_completed', True):
+        count += count_subquery(TaskArchive)
+    return count
+
+
+class Command(BaseCommand):
+    help = "Reconcile the denormalized UserProfile task counters with the Task and TaskArchive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Profiles corrected per UPDATE statement.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Report drifted profiles without fixing them.")
+        parser.add_argument('--enqueue', action='store_true',
+                            help="Leave the rebuild to the job worker (run_jobs) instead of running it here.")
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            enqueue('rebuild_task_counters', key='all')
+            self.stdout.write(self.style.SUCCESS("Counter rebuild queued."))
+            return
+
+        drifted = UserProfile.objects.annotate(
+            actual_total=actual_task_count(),
+            actual_completed=actual_task_count(is_completed=True),
+        ).exclude(
+            task_count=F('actual_total'),
+            completed_task_count=F('actual_completed'),
+            pending_task_count=F('actual_total') - F('actual_completed'),
+        )
+
+        pks = []
+        for profile in drifted.iterator(chunk_size=options['batch_size']):
+            self.stdout.write(
+                f"{profile.name}: total {profile.task_count}->{profile.actual_total}, "
+                f"completed {profile.completed_task_count}->{profile.actual_completed}"
+            )
+            pks.append(profile.pk)
+
+        if not options['dry_run']:
+            # Recount inside the UPDATE itself so concurrent task writes aren't overwritten with stale values
+            for start in range(0, len(pks), options['batch_size']):
+                UserProfile.objects.filter(pk__in=pks[start:start + options['batch_size']]).update(
+                    task_count=actual_task_count(),
+                    completed_task_count=actual_task_count(is_completed=True),
+                    pending_task_count=actual_task_count(is_completed=False),
+                )
+
+        verb = "would be corrected" if options['dry_run'] else "corrected"
+        self.stdout.write(self.style.SUCCESS(f"{len(pks)} profile(s) {verb}."))
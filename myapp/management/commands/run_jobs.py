@@ -0,0 +1,50 @@
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from myapp.jobs import claim_jobs, purge_finished_jobs, requeue_stale_jobs, run_job, run_job_in_thread
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs, polling until stopped (SIGTERM finishes the current batch first)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help="Jobs run at once, each in its own thread.")
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Seconds to wait between polls when the queue is empty.")
+        parser.add_argument('--burst', action='store_true',
+                            help="Exit once no jobs are due instead of polling.")
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        concurrency = options['concurrency']
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+
+        pool = ThreadPoolExecutor(concurrency, thread_name_prefix='job') if concurrency > 1 else None
+        ran = failed = 0
+        try:
+            while not self.stopping:
+                requeue_stale_jobs()
+                jobs = claim_jobs(worker, concurrency)
+                if not jobs:
+                    if options['burst']:
+                        break
+                    purge_finished_jobs()
+                    time.sleep(options['interval'])
+                    continue
+                results = list(pool.map(run_job_in_thread, jobs)) if pool else [run_job(job) for job in jobs]
+                ran += len(results)
+                failed += results.count(False)
+        finally:
+            if pool:
+                pool.shutdown()
+        self.stdout.write(f"Ran {ran} job(s), {failed} failed.")
+
+    def stop(self, signum, frame):
+        self.stopping = True
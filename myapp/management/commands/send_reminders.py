@@ -0,0 +1,38 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from myapp.reminders import ReminderScheduler
+
+
+class Command(BaseCommand):
+    help = "Send due-date reminders, sleeping until the next deadline (SIGTERM stops after the current batch)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refresh', type=float, default=settings.TASK_REMINDER_REFRESH_SECONDS,
+                            help="Longest sleep before checking for new or changed deadlines.")
+        parser.add_argument('--once', action='store_true',
+                            help="Send what is due now and exit, for running from cron.")
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        scheduler = ReminderScheduler()
+        sent = 0
+        while not self.stopping:
+            scheduler.refresh()
+            sent += scheduler.fire()
+            if options['once']:
+                break
+            wakeup = scheduler.next_wakeup()
+            delay = options['refresh']
+            if wakeup is not None:
+                delay = min(delay, max((wakeup - now()).total_seconds(), 0))
+            time.sleep(delay)
+        self.stdout.write(f"Sent {sent} reminder(s).")
+
+    def stop(self, signum, frame):
+        self.stopping = True
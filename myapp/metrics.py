@@ -0,0 +1,131 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Latency bucket upper bounds in ms, 25% apart: 0.5 ms up to about 4 minutes
+BUCKETS = tuple(0.5 * 1.25 ** i for i in range(60))
+PERCENTILES = (50, 95, 99)
+
+# Metrics for the request being served, picked up by the query wrapper and template backend
+current_request = ContextVar('current_request', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('started', 'queries', 'db_time', 'template_time')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook: count and time every query."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+
+def request_metric_names():
+    """The URL names in myapp.urls, which are the ones the histograms track."""
+    from . import urls
+    return [pattern.name for pattern in urls.urlpatterns if pattern.name]
+
+
+def empty_stats():
+    return {'count': 0, 'queries': 0, 'db_ms': 0.0, 'template_ms': 0.0, 'bytes': 0, 'buckets': {}}
+
+
+def merge_stats(into, stats):
+    for field in ('count', 'queries', 'db_ms', 'template_ms', 'bytes'):
+        into[field] += stats[field]
+    for index, count in stats['buckets'].items():
+        into['buckets'][index] = into['buckets'].get(index, 0) + count
+    return into
+
+
+def percentile(buckets, count, pct):
+    """Upper bound (ms) of the bucket holding the ``pct``-th percentile request."""
+    rank = max(1, round(count * pct / 100))
+    seen = 0
+    for index in sorted(buckets):
+        seen += buckets[index]
+        if seen >= rank:
+            return round(BUCKETS[index], 1) if index < len(BUCKETS) else None
+    return None
+
+
+class MetricsStore:
+    """
+    Per-URL-name histograms. Each process buffers its own counts and merges
+    them into the cache every INSTRUMENTATION_FLUSH_SECONDS, so every worker's
+    requests show up when the cache backend is shared (file or redis).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = defaultdict(empty_stats)
+        self.flushed_at = time.monotonic()
+
+    def record(self, name, duration, queries, db_time, template_time, size):
+        with self.lock:
+            stats = self.pending[name]
+            stats['count'] += 1
+            stats['queries'] += queries
+            stats['db_ms'] += db_time * 1000
+            stats['template_ms'] += template_time * 1000
+            stats['bytes'] += size or 0
+            index = bisect_left(BUCKETS, duration * 1000)
+            stats['buckets'][index] = stats['buckets'].get(index, 0) + 1
+            due = time.monotonic() - self.flushed_at >= settings.INSTRUMENTATION_FLUSH_SECONDS
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(empty_stats)
+            self.flushed_at = time.monotonic()
+        if not pending:
+            return
+        # Read-merge-write: two workers flushing the same URL at once can drop one batch
+        keys = {name: f'metrics:{name}' for name in pending}
+        stored = cache.get_many(keys.values())
+        cache.set_many({
+            key: merge_stats(stored.get(key) or empty_stats(), pending[name]) for name, key in keys.items()
+        }, timeout=None)
+
+    def snapshot(self, names):
+        """Aggregated count, p50/p95/p99 latency and per-request averages for each URL name."""
+        self.flush()
+        stored = cache.get_many([f'metrics:{name}' for name in names])
+        report = {}
+        for name in names:
+            stats = stored.get(f'metrics:{name}')
+            if not stats or not stats['count']:
+                continue
+            count = stats['count']
+            report[name] = {
+                'count': count,
+                **{f'p{pct}_ms': percentile(stats['buckets'], count, pct) for pct in PERCENTILES},
+                'avg_queries': round(stats['queries'] / count, 2),
+                'avg_db_ms': round(stats['db_ms'] / count, 2),
+                'avg_template_ms': round(stats['template_ms'] / count, 2),
+                'avg_bytes': round(stats['bytes'] / count),
+            }
+        return report
+
+    def reset(self, names):
+        with self.lock:
+            self.pending.clear()
+        cache.delete_many([f'metrics:{name}' for name in names])
+
+
+store = MetricsStore()
@@ -0,0 +1,166 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import RequestMetrics, current_request, request_metric_names, store
+from .presence import arecord_presence, record_presence
+from .routers import begin_request, end_request
+
+
+async def resolved_user(user):
+    return user
+
+
+class PresenceMiddleware:
+    """Record a throttled last-seen timestamp for every authenticated request."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Under ASGI, stay on the event loop instead of hopping to a thread per request
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        user = request.user
+        if user.is_authenticated:
+            record_presence(user)
+        # Hand the loaded user to async views' request.auser() so they don't fetch it again
+        request.auser = partial(resolved_user, user)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        user = await request.auser()
+        if user.is_authenticated:
+            await arecord_presence(user)
+        return await self.get_response(request)
+
+
+class InstrumentationMiddleware:
+    """
+    Opt-in (INSTRUMENTATION=True) request timing: total, SQL and template time
+    plus response size, reported in a Server-Timing header, a JSON log line and
+    the per-URL-name histograms behind the request_metrics view.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.logger = logging.getLogger(settings.INSTRUMENTATION_LOGGER)
+        self.url_names = set(request_metric_names())
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_request.set(metrics)
+        try:
+            with self.wrap_queries(metrics):
+                response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.report(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_request.set(metrics)
+        try:
+            with self.wrap_queries(metrics):
+                response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.report(request, response, metrics)
+
+    def wrap_queries(self, metrics):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+        return stack
+
+    def report(self, request, response, metrics):
+        duration = time.perf_counter() - metrics.started
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        # Streamed bodies are still being produced, so their size isn't known here
+        size = None if response.streaming else len(response.content)
+
+        response['Server-Timing'] = ', '.join([
+            f'total;dur={duration * 1000:.1f}',
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+            f'tpl;dur={metrics.template_time * 1000:.1f}',
+        ])
+        self.logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'url_name': url_name,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'db_queries': metrics.queries,
+            'db_ms': round(metrics.db_time * 1000, 2),
+            'template_ms': round(metrics.template_time * 1000, 2),
+            'bytes': size,
+        }))
+        if url_name in self.url_names:
+            store.record(url_name, duration, metrics.queries, metrics.db_time, metrics.template_time, size)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets myapp.routers send this request's reads to a replica, unless the
+    request is unsafe or the user wrote within DATABASE_REPLICA_STICKY_SECONDS.
+    A request that writes sets the cookie that pins the user's next requests.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = begin_request(self.pinned(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        return self.stick(state, response)
+
+    async def __acall__(self, request):
+        state, token = begin_request(self.pinned(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        return self.stick(state, response)
+
+    def pinned(self, request):
+        return request.method not in ('GET', 'HEAD', 'OPTIONS') or settings.DATABASE_REPLICA_STICKY_COOKIE in request.COOKIES
+
+    def stick(self, state, response):
+        if state['wrote']:
+            response.set_cookie(
+                settings.DATABASE_REPLICA_STICKY_COOKIE, '1', max_age=settings.DATABASE_REPLICA_STICKY_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax',
+            )
+        return response
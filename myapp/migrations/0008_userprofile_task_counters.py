@@ -0,0 +1,46 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:14
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_task_counters(apps, schema_editor):
+    UserProfile = apps.get_model('myapp', 'UserProfile')
+    Task = apps.get_model('myapp', 'Task')
+
+    def count(**filters):
+        tasks = Task.objects.filter(user=OuterRef('user'), **filters).order_by().values('user')
+        return Coalesce(Subquery(tasks.annotate(c=Count('pk')).values('c'), output_field=IntegerField()), 0)
+
+    UserProfile.objects.update(
+        task_count=count(),
+        completed_task_count=count(is_completed=True),
+        pending_task_count=count(is_completed=False),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0007_task_description_alter_userprofile_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='completed_task_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='pending_task_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='task_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_task_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# Spelled out here rather than taken from myapp.search, so replaying this
+# migration doesn't depend on how the search backends look later
+SQLITE_FTS = 'myapp_task_fts'
+POSTGRES_INDEX = 'myapp_task_search_gin'
+
+
+def sqlite_install_sql(task):
+    fts = SQLITE_FTS
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"title, description, content='{task}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {task} BEGIN "
+        f"INSERT INTO {fts}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {task} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, title, description) "
+        f"VALUES ('delete', old.id, old.title, old.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF title, description ON {task} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, title, description) "
+        f"VALUES ('delete', old.id, old.title, old.description); "
+        f"INSERT INTO {fts}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        # Index rows that existed before the triggers did
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def postgres_index():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+    return GinIndex(SearchVector('title', 'description', config='english'), name=POSTGRES_INDEX)
+
+
+def install_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    Task = apps.get_model('myapp', 'Task')
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                return
+        for sql in sqlite_install_sql(Task._meta.db_table):
+            schema_editor.execute(sql)
+    elif connection.vendor == 'postgresql':
+        schema_editor.add_index(Task, postgres_index())
+
+
+def uninstall_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {SQLITE_FTS}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_FTS}")
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {POSTGRES_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_userprofile_task_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:22
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+import myapp.models
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class PostgresTrigramExtension(TrigramExtension):
+    # TrigramExtension only checks the database vendor going forwards
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_userpresence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Skipped off PostgreSQL, and when pg_trgm is already installed (so no superuser needed)
+        PostgresTrigramExtension(),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='task_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'is_completed', 'created_at', 'id'], name='task_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['created_at', 'id'], name='task_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['created_at', 'id'], name='task_pending_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['name'], name='userprofile_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=myapp.models.PostgresGinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='userprofile_name_trgm_idx'),
+        ),
+    ]
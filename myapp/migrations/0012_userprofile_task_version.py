@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0011_task_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='task_version',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='tasks_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_created_events(apps, schema_editor):
+    """Seed the log with a 'created' event per existing task, so the feed isn't empty after deploy."""
+    Task = apps.get_model('myapp', 'Task')
+    TaskEvent = apps.get_model('myapp', 'TaskEvent')
+    batch = []
+    for task_id, user_id, title, created_at in Task.objects.values_list(
+        'id', 'user_id', 'title', 'created_at'
+    ).iterator(chunk_size=2000):
+        batch.append(TaskEvent(task_id=task_id, user_id=user_id, title=title, action='created', timestamp=created_at))
+        if len(batch) == 2000:
+            TaskEvent.objects.bulk_create(batch)
+            batch = []
+    TaskEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0014_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('completed', 'Completed'), ('reopened', 'Reopened'), ('deleted', 'Deleted')], max_length=10)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'timestamp', 'id'], name='taskevent_user_time_idx'), models.Index(fields=['timestamp', 'id'], name='taskevent_time_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_created_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+EMAIL_INDEX = 'myapp_auth_user_email_idx'
+
+
+def add_user_email_index(apps, schema_editor):
+    # Registration and provisioning look users up by email; auth.User doesn't index it
+    table = apps.get_model('auth', 'User')._meta.db_table
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {EMAIL_INDEX} ON {schema_editor.quote_name(table)} (email)"
+    )
+
+
+def remove_user_email_index(apps, schema_editor):
+    schema_editor.execute(f"DROP INDEX IF EXISTS {EMAIL_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('myapp', '0015_taskevent'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_user_email_index, remove_user_email_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0018_taskarchive'),
+    ]
+
+    operations = [
+        # Only Python fills the default, so the column is unchanged; applied to the
+        # database, SQLite would rebuild the whole task table for nothing
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='task',
+                    name='created_at',
+                    field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+                ),
+            ],
+        ),
+    ]
@@ -1,32 +1,358 @@
-from django.db import models
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.db.backends.ddl_references import Statement
+from django.db.models import F, Q
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
+from django.utils.timezone import now
 
 ROLE_CHOICES = (
     ('admin', 'Admin'),
     ('user', 'User')
 )
 
+# Dashboard status filters that depend on the clock rather than on task writes
+DUE_FILTERS = ('overdue', 'due_soon')
+
+# Per-user task change deltas and activity events collected while batch_task_changes() is active
+_pending_task_changes = ContextVar('pending_task_changes', default=None)
+_pending_task_events = ContextVar('pending_task_events', default=None)
+_archiving_tasks = ContextVar('archiving_tasks', default=False)
+_purging_user_rows = ContextVar('purging_user_rows', default=False)
+
+
+@contextmanager
+def batch_task_changes():
+    """
+    Collect task changes for the duration of the block and record them as
+    one UPDATE per affected user and one INSERT of activity events on exit,
+    instead of one of each per task.
+    """
+    if _pending_task_changes.get() is not None:
+        yield
+        return
+    deltas = defaultdict(lambda: [0, 0])
+    events = []
+    token = _pending_task_changes.set(deltas)
+    events_token = _pending_task_events.set(events)
+    try:
+        yield
+    finally:
+        _pending_task_changes.reset(token)
+        _pending_task_events.reset(events_token)
+    for user_id, (total, completed) in deltas.items():
+        UserProfile.record_task_change(user_id, total, completed)
+    TaskEvent.objects.bulk_create(events)
+
+class PostgresGinIndex(GinIndex):
+    """
+    A GIN index on PostgreSQL and nothing elsewhere. SQLite rebuilds a table
+    with all of its Meta.indexes when a migration alters it, so a plain
+    GinIndex there would break every later migration of the model.
+    """
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return Statement('')
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+    def remove_sql(self, model, schema_editor, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return Statement('')
+        return super().remove_sql(model, schema_editor, **kwargs)
+
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, null=True)
     name = models.CharField(max_length=100)
     email = models.EmailField()  # Removed unique=True to avoid conflicts
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    # Content hash naming the processed avatar's thumbnails; empty until myapp.avatars has run
+    avatar_hash = models.CharField(max_length=16, blank=True, default='')
     joined_at = models.DateTimeField(auto_now_add=True)
     last_login = models.DateTimeField(blank=True, null=True)
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='user')
+    # Denormalized task counters, maintained by the Task signals in myapp.signals
+    task_count = models.IntegerField(default=0)
+    completed_task_count = models.IntegerField(default=0)
+    pending_task_count = models.IntegerField(default=0)
+    # Bumped on every change to the user's tasks; drives API ETags and Last-Modified
+    task_version = models.IntegerField(default=0)
+    tasks_changed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Admin user search. name__icontains compiles to UPPER(name) LIKE UPPER(%s)
+            # on Postgres, which the trigram index serves
+            models.Index(fields=['name'], name='userprofile_name_idx'),
+            PostgresGinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='userprofile_name_trgm_idx'),
+        ]
+
+    @classmethod
+    def record_task_change(cls, user_id, total=0, completed=0):
+        """
+        Apply a counter delta and bump the task version in a single UPDATE,
+        so concurrent writers don't clobber each other.
+        """
+        pending = _pending_task_changes.get()
+        if pending is not None:
+            pending[user_id][0] += total
+            pending[user_id][1] += completed
+            return
+        cls.objects.filter(user_id=user_id).update(
+            task_count=F('task_count') + total,
+            completed_task_count=F('completed_task_count') + completed,
+            pending_task_count=F('pending_task_count') + (total - completed),
+            task_version=F('task_version') + 1,
+            tasks_changed_at=now(),
+        )
+
+    def avatar_url(self, size, ext='webp'):
+        """URL of the ``size``px square thumbnail, or None if the avatar isn't processed yet."""
+        if not self.avatar_hash:
+            return None
+        return default_storage.url(f'avatars/{self.avatar_hash}/{size}.{ext}')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored email so save() can tell whether the User row needs it
+        if 'email' in field_names:
+            instance._loaded_email = instance.email
+        return instance
+
+    def email_changed(self, update_fields=None):
+        if not self.user_id or (update_fields is not None and 'email' not in update_fields):
+            return False
+        if UserProfile.user.is_cached(self):
+            return self.email != self.user.email
+        return self.email != getattr(self, '_loaded_email', None)
 
     def save(self, *args, **kwargs):
-        if self.user and self.email != self.user.email:
+        if not self.email_changed(kwargs.get('update_fields')):
+            return super().save(*args, **kwargs)
+        # Copy the email to the User with a single-column UPDATE rather than a full User.save()
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            User.objects.filter(pk=self.user_id).update(email=self.email)
+        if UserProfile.user.is_cached(self):
             self.user.email = self.email
-            self.user.save()
-        super().save(*args, **kwargs)
+        self._loaded_email = self.email
 
 class Task(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)  # Added for task search
     is_completed = models.BooleanField(default=False)
+    # A default rather than auto_now_add, so imports can keep the created_at they were exported with
+    created_at = models.DateTimeField(default=now, editable=False)
+    due_date = models.DateTimeField(blank=True, null=True)
+    # Set when the reminder scheduler has sent this task's reminder; cleared when due_date moves
+    reminded_at = models.DateTimeField(blank=True, null=True)
+
+    is_archived = False
+
+    class Meta:
+        # Dashboard lists filter by owner and status and page on (created_at, id)
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='task_user_created_idx'),
+            models.Index(fields=['user', 'is_completed', 'created_at', 'id'], name='task_user_status_idx'),
+            models.Index(fields=['created_at', 'id'], name='task_created_idx'),
+            models.Index(
+                fields=['created_at', 'id'], condition=Q(is_completed=False), name='task_pending_created_idx'
+            ),
+            # Overdue / due-soon filters and the reminder scheduler only ever look at open tasks with a deadline
+            models.Index(
+                fields=['user', 'due_date'], condition=Q(is_completed=False, due_date__isnull=False),
+                name='task_user_pending_due_idx',
+            ),
+            models.Index(
+                fields=['due_date', 'id'], condition=Q(is_completed=False, due_date__isnull=False),
+                name='task_pending_due_idx',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the counted state so signals can diff it without re-reading the row
+        if 'user_id' in field_names and 'is_completed' in field_names:
+            instance._counted_state = (instance.user_id, instance.is_completed)
+        if 'due_date' in field_names:
+            instance._loaded_due_date = instance.due_date
+        return instance
+
+    def save(self, *args, **kwargs):
+        # A new deadline needs a new reminder
+        if self.reminded_at and self.due_date != getattr(self, '_loaded_due_date', self.due_date):
+            self.reminded_at = None
+        # Keep the row write and the counter update in one transaction
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+        self._loaded_due_date = self.due_date
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().delete(*args, **kwargs)
+
+    def __str__(self):
+        return self.title
+
+
+class TaskArchive(models.Model):
+    """
+    Completed tasks moved out of Task by the archive_tasks command, so the
+    dashboard's default queries only touch open and recent work. Rows keep
+    their Task id. The profile counters still count them, so totals don't
+    drop when a task is archived.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    due_date = models.DateTimeField(blank=True, null=True)
+    archived_at = models.DateTimeField(default=now)
+
+    # Only completed tasks are archived; lets task cards and serializers treat both alike
+    is_completed = True
+    is_archived = True
+
+    class Meta:
+        # Read alongside Task in the same newest-first (created_at, id) order
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='taskarchive_user_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='taskarchive_created_idx'),
+        ]
+
+    @classmethod
+    def archive(cls, task_ids):
+        """
+        Move the completed tasks among ``task_ids`` into the archive in one
+        transaction. Ids that are gone or were reopened since they were picked
+        are skipped. Returns ``(moved, user_ids)``: how many tasks the DELETE
+        removed, and the ids of their owners.
+        """
+        with transaction.atomic():
+            tasks = list(Task.objects.select_for_update().filter(id__in=task_ids, is_completed=True))
+            cls.objects.bulk_create([
+                cls(id=task.pk, user_id=task.user_id, title=task.title, description=task.description,
+                    created_at=task.created_at, due_date=task.due_date)
+                for task in tasks
+            ])
+            token = _archiving_tasks.set(True)
+            try:
+                _, deleted = Task.objects.filter(id__in=[task.pk for task in tasks]).delete()
+            finally:
+                _archiving_tasks.reset(token)
+        return deleted.get(Task._meta.label, 0), {task.user_id for task in tasks}
+
+    def __str__(self):
+        return self.title
+
+
+def archiving_tasks():
+    """True while TaskArchive.archive() deletes the rows it has copied; the Task delete signals stand aside."""
+    return _archiving_tasks.get()
+
+
+@contextmanager
+def purge_user_rows():
+    """
+    Batch-delete a user's rows ahead of the user itself. Like the cascade from
+    deleting the user, the Task delete signals stand aside: the profile, its
+    counters and its events are about to go too.
+    """
+    token = _purging_user_rows.set(True)
+    try:
+        yield
+    finally:
+        _purging_user_rows.reset(token)
+
+
+def purging_user_rows():
+    return _purging_user_rows.get()
+
+
+TASK_EVENT_CHOICES = (
+    ('created', 'Created'),
+    ('updated', 'Updated'),
+    ('completed', 'Completed'),
+    ('reopened', 'Reopened'),
+    ('deleted', 'Deleted'),
+)
+
+
+class TaskEvent(models.Model):
+    """
+    Append-only log of task activity behind the dashboard's recent-activity
+    feed. Rows keep a copy of the title and outlive their task; the
+    compact_task_events command bounds the table.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    task_id = models.BigIntegerField()
+    title = models.CharField(max_length=200)
+    action = models.CharField(max_length=10, choices=TASK_EVENT_CHOICES)
+    timestamp = models.DateTimeField(default=now)
+
+    class Meta:
+        # Newest-first reads per owner and, for admins, across everyone
+        indexes = [
+            models.Index(fields=['user', 'timestamp', 'id'], name='taskevent_user_time_idx'),
+            models.Index(fields=['timestamp', 'id'], name='taskevent_time_idx'),
+        ]
+
+    @classmethod
+    def record(cls, action, task, user_id=None):
+        event = cls(user_id=user_id or task.user_id, task_id=task.pk, title=task.title, action=action)
+        pending = _pending_task_events.get()
+        if pending is not None:
+            pending.append(event)
+        else:
+            event.save()
+        return event
+
+
+class UserPresence(models.Model):
+    """Last time each user made a request, written by myapp.middleware.PresenceMiddleware."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    last_seen = models.DateTimeField(db_index=True)
+
+
+JOB_STATUS_CHOICES = (
+    ('queued', 'Queued'),
+    ('running', 'Running'),
+    ('done', 'Done'),
+    ('failed', 'Failed'),
+)
+
+
+class Job(models.Model):
+    """Deferred work run by ``manage.py run_jobs``; see myapp.jobs."""
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    # Jobs sharing a name and non-empty key are queued at most once
+    key = models.CharField(max_length=200, blank=True, default='')
+    status = models.CharField(max_length=10, choices=JOB_STATUS_CHOICES, default='queued')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_at = models.DateTimeField(default=now)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Workers poll for due jobs in run_at order
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f'{self.name} #{self.pk} ({self.status})'
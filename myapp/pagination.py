@@ -0,0 +1,138 @@
+import base64
+import heapq
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.template.loader import render_to_string
+
+from .streaming import streaming_response
+
+# Placeholder rendered by home.html where streamed task cards are spliced in
+TASK_STREAM_MARKER = '<!-- task-stream -->'
+
+
+def get_page_size(request):
+    default = settings.TASKS_PAGE_SIZE
+    maximum = settings.TASKS_MAX_PAGE_SIZE
+    try:
+        page_size = int(request.GET.get('page_size', default))
+    except (TypeError, ValueError):
+        page_size = default
+    return max(1, min(page_size, maximum))
+
+
+def encode_cursor(task):
+    raw = f"{task.created_at.isoformat()}|{task.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return ``(created_at, id)`` for a cursor, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except ValueError:
+        return None
+
+
+def keyset_filter(queryset, cursor=None):
+    """Order newest first on ``(created_at, id)`` and seek past ``cursor``."""
+    queryset = queryset.order_by('-created_at', '-id')
+    position = decode_cursor(cursor)
+    if position:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+    return queryset
+
+
+def newest_first(task):
+    return task.created_at, task.pk
+
+
+def paginate_tasks(queryset, cursor=None, page_size=50, archive=None):
+    """
+    Fetch one page of tasks and the cursor for the next page (None on the last page).
+    With an ``archive`` queryset, its rows are merged in by the same key;
+    archived tasks keep their Task ids, so one cursor seeks through both.
+    """
+    tasks = list(keyset_filter(queryset, cursor)[:page_size + 1])
+    if archive is not None:
+        tasks = list(heapq.merge(
+            tasks, keyset_filter(archive, cursor)[:page_size + 1], key=newest_first, reverse=True
+        ))[:page_size + 1]
+    next_cursor = encode_cursor(tasks[page_size - 1]) if len(tasks) > page_size else None
+    return tasks[:page_size], next_cursor
+
+
+async def apaginate_tasks(queryset, cursor=None, page_size=50, archive=None):
+    tasks = [task async for task in keyset_filter(queryset, cursor)[:page_size + 1]]
+    if archive is not None:
+        archived = [task async for task in keyset_filter(archive, cursor)[:page_size + 1]]
+        tasks = list(heapq.merge(tasks, archived, key=newest_first, reverse=True))[:page_size + 1]
+    next_cursor = encode_cursor(tasks[page_size - 1]) if len(tasks) > page_size else None
+    return tasks[:page_size], next_cursor
+
+
+async def amerge_newest(*iterators):
+    """heapq.merge(..., reverse=True) for async iterators that are each newest first."""
+    heads = [[await anext(iterator, None), iterator] for iterator in iterators]
+    heads = [head for head in heads if head[0] is not None]
+    while heads:
+        head = max(heads, key=lambda entry: newest_first(entry[0]))
+        yield head[0]
+        head[0] = await anext(head[1], None)
+        if head[0] is None:
+            heads.remove(head)
+
+
+def stream_task_list(request, template_name, context, queryset, cursor=None, archive=None):
+    """
+    Render ``template_name`` once, then stream every task card in place of
+    TASK_STREAM_MARKER, reading the queryset (and ``archive``, merged in
+    order) in chunks so memory stays flat.
+    """
+    page = render_to_string(template_name, context, request)
+    head, _, tail = page.partition(TASK_STREAM_MARKER)
+    chunk_size = settings.TASKS_STREAM_CHUNK_SIZE
+
+    def render_cards(tasks):
+        return render_to_string('myapp/task_cards.html', {'tasks': tasks}, request)
+
+    def generate():
+        yield head
+        batch = []
+        tasks = keyset_filter(queryset, cursor).iterator(chunk_size=chunk_size)
+        if archive is not None:
+            archived = keyset_filter(archive, cursor).iterator(chunk_size=chunk_size)
+            tasks = heapq.merge(tasks, archived, key=newest_first, reverse=True)
+        for task in tasks:
+            batch.append(task)
+            if len(batch) == chunk_size:
+                yield render_cards(batch)
+                batch = []
+        if batch:
+            yield render_cards(batch)
+        yield tail
+
+    async def agenerate():
+        yield head
+        batch = []
+        tasks = keyset_filter(queryset, cursor).aiterator(chunk_size=chunk_size)
+        if archive is not None:
+            tasks = amerge_newest(tasks, keyset_filter(archive, cursor).aiterator(chunk_size=chunk_size))
+        async for task in tasks:
+            batch.append(task)
+            if len(batch) == chunk_size:
+                yield render_cards(batch)
+                batch = []
+        if batch:
+            yield render_cards(batch)
+        yield tail
+
+    return streaming_response(request, generate, agenerate, content_type='text/html; charset=utf-8')
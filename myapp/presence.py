@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import now
+
+from .models import UserPresence
+
+
+def record_presence(user):
+    """Stamp ``user`` as seen now, writing at most once per PRESENCE_THROTTLE_SECONDS."""
+    # cache.add only succeeds when the key is absent, so it doubles as the write throttle
+    if not cache.add(f'presence:{user.pk}', True, timeout=settings.PRESENCE_THROTTLE_SECONDS):
+        return
+    seen = now()
+    if not UserPresence.objects.filter(user_id=user.pk).update(last_seen=seen):
+        UserPresence.objects.get_or_create(user_id=user.pk, defaults={'last_seen': seen})
+
+
+async def arecord_presence(user):
+    if not await cache.aadd(f'presence:{user.pk}', True, timeout=settings.PRESENCE_THROTTLE_SECONDS):
+        return
+    seen = now()
+    if not await UserPresence.objects.filter(user_id=user.pk).aupdate(last_seen=seen):
+        await UserPresence.objects.aget_or_create(user_id=user.pk, defaults={'last_seen': seen})
+
+
+def clear_presence(user):
+    cache.delete(f'presence:{user.pk}')
+    UserPresence.objects.filter(user_id=user.pk).delete()
+
+
+def online_user_count(window=None):
+    """Users seen within the sliding window: one range count on the last_seen index."""
+    window = window or timedelta(seconds=settings.PRESENCE_WINDOW_SECONDS)
+    return UserPresence.objects.filter(last_seen__gte=now() - window).count()
+
+
+async def aonline_user_count(window=None):
+    window = window or timedelta(seconds=settings.PRESENCE_WINDOW_SECONDS)
+    return await UserPresence.objects.filter(last_seen__gte=now() - window).acount()
@@ -0,0 +1,150 @@
+"""
+Due-date reminders for open tasks.
+
+ReminderScheduler keeps upcoming deadlines in a heap and sleeps until the
+earliest one instead of polling the task table. It reads deadlines from the
+partial (due_date, id) index one window at a time: each refresh reads only
+the slice the window has moved over, plus the tasks the TaskEvent log shows
+changing since the last refresh. Reminders go out through
+TASK_REMINDER_BACKEND.
+"""
+import heapq
+import json
+import logging
+import sys
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+from django.utils.module_loading import import_string
+from django.utils.timezone import now
+
+from .models import Task, TaskEvent
+
+logger = logging.getLogger(__name__)
+
+
+def reminder_data(task):
+    return {
+        'task': task.pk,
+        'title': task.title,
+        'username': task.user.username,
+        'email': task.user.email,
+        'due_date': task.due_date,
+    }
+
+
+class ConsoleReminderBackend:
+    """Writes each reminder as a line on stdout; for development."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, tasks):
+        for task in tasks:
+            self.stream.write(f"Reminder for {task.user.username}: '{task.title}' is due {task.due_date:%Y-%m-%d %H:%M}\n")
+        self.stream.flush()
+
+
+class FileReminderBackend:
+    """Appends one JSON line per reminder to TASK_REMINDER_FILE, for another process to pick up."""
+
+    def send(self, tasks):
+        with open(settings.TASK_REMINDER_FILE, 'a', encoding='utf-8') as out:
+            for task in tasks:
+                out.write(json.dumps(reminder_data(task), cls=DjangoJSONEncoder) + '\n')
+
+
+def get_reminder_backend():
+    return import_string(settings.TASK_REMINDER_BACKEND)()
+
+
+def reminder_candidates():
+    """Open tasks with a deadline whose reminder hasn't gone out; served by task_pending_due_idx."""
+    return Task.objects.filter(is_completed=False, due_date__isnull=False, reminded_at__isnull=True)
+
+
+class ReminderScheduler:
+    """
+    Deadlines due within ``lead + horizon`` held in a heap of
+    ``(remind_at, task_id)``. ``scheduled`` maps each task to its current
+    entry; heap entries that no longer match it are stale and skipped.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or get_reminder_backend()
+        self.lead = timedelta(minutes=settings.TASK_REMINDER_LEAD_MINUTES)
+        self.horizon = timedelta(seconds=settings.TASK_REMINDER_HORIZON_SECONDS)
+        self.resync = timedelta(seconds=settings.TASK_REMINDER_RESYNC_SECONDS)
+        self.heap = []
+        self.scheduled = {}
+        self.loaded_until = None
+        self.last_event_id = None
+        self.synced_at = None
+
+    def schedule(self, tasks):
+        for task_id, due_date in tasks.values_list('id', 'due_date'):
+            remind_at = due_date - self.lead
+            if self.scheduled.get(task_id) != remind_at:
+                self.scheduled[task_id] = remind_at
+                heapq.heappush(self.heap, (remind_at, task_id))
+
+    def refresh(self, current=None):
+        current = current or now()
+        until = current + self.lead + self.horizon
+        latest_event = TaskEvent.objects.aggregate(latest=Max('id'))['latest'] or 0
+
+        if self.synced_at is None or current - self.synced_at >= self.resync:
+            # A full read of the window now and then catches anything the event log missed,
+            # such as a change whose transaction committed after a later event was read
+            self.heap, self.scheduled = [], {}
+            self.schedule(reminder_candidates().filter(due_date__lte=until))
+            self.synced_at = current
+        else:
+            # Tasks created, edited, completed or deleted since the last refresh: drop their
+            # entries and re-read whichever still need a reminder inside the window
+            changed = set(
+                TaskEvent.objects.filter(id__gt=self.last_event_id, id__lte=latest_event)
+                .values_list('task_id', flat=True)
+            )
+            for task_id in changed:
+                self.scheduled.pop(task_id, None)
+            if changed:
+                self.schedule(reminder_candidates().filter(id__in=changed, due_date__lte=until))
+            self.schedule(reminder_candidates().filter(due_date__gt=self.loaded_until, due_date__lte=until))
+        self.loaded_until = until
+        self.last_event_id = latest_event
+
+    def next_wakeup(self):
+        """When the earliest scheduled reminder is due, or None with nothing scheduled."""
+        while self.heap and self.scheduled.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
+    def fire(self, current=None):
+        """Send every reminder due by ``current``; returns how many went out."""
+        current = current or now()
+        due_ids = []
+        while self.heap and self.heap[0][0] <= current:
+            remind_at, task_id = heapq.heappop(self.heap)
+            if self.scheduled.get(task_id) == remind_at:
+                del self.scheduled[task_id]
+                due_ids.append(task_id)
+        if not due_ids:
+            return 0
+        # Re-check against the table: the task may have been completed or rescheduled since it was loaded
+        tasks = list(
+            reminder_candidates().filter(id__in=due_ids, due_date__lte=current + self.lead)
+            .select_related('user').order_by('due_date', 'id')
+        )
+        if not tasks:
+            return 0
+        try:
+            self.backend.send(tasks)
+        except Exception:
+            # Left unmarked, so the next full resync schedules them again
+            logger.exception("Sending %d reminder(s) failed", len(tasks))
+            return 0
+        Task.objects.filter(id__in=[task.pk for task in tasks]).update(reminded_at=current)
+        return len(tasks)
@@ -0,0 +1,108 @@
+"""
+Read/write splitting between the primary ('default') and DATABASE_REPLICAS.
+
+Writes always go to the primary. Reads made while serving a request go to a
+healthy replica, except:
+
+- reads inside a transaction on the primary;
+- every read of an unsafe (POST, PUT, ...) request, and of a request that has
+  already written. ReplicaRoutingMiddleware then sets a cookie that keeps the
+  user on the primary for DATABASE_REPLICA_STICKY_SECONDS, so they read their
+  own writes through replication lag;
+- session lookups, which must see a login at once.
+
+Background workers and management commands read from the primary, since they
+read rows and then write them.
+"""
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+# Routing state of the request being served, set by ReplicaRoutingMiddleware
+_request_state = ContextVar('replica_request_state', default=None)
+
+
+def begin_request(pinned):
+    """Start routing a request's reads; ``pinned`` keeps them on the primary. Returns ``(state, token)``."""
+    state = {'pinned': pinned, 'wrote': False}
+    return state, _request_state.set(state)
+
+
+def end_request(token):
+    _request_state.reset(token)
+
+
+class ReplicaHealth:
+    """
+    Per-process view of which replicas answer. A replica is probed at most
+    every DATABASE_REPLICA_CHECK_SECONDS while up, and every
+    DATABASE_REPLICA_RETRY_SECONDS once it has failed.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked = {}
+
+    def is_healthy(self, alias):
+        current = time.monotonic()
+        with self.lock:
+            healthy, checked_at = self.checked.get(alias, (True, None))
+        interval = settings.DATABASE_REPLICA_CHECK_SECONDS if healthy else settings.DATABASE_REPLICA_RETRY_SECONDS
+        if checked_at is not None and current - checked_at < interval:
+            return healthy
+        healthy = self.probe(alias)
+        if not healthy:
+            logger.warning("Replica %s is unreachable; reading from the primary", alias)
+        with self.lock:
+            self.checked[alias] = (healthy, current)
+        return healthy
+
+    def probe(self, alias):
+        connection = connections[alias]
+        try:
+            connection.ensure_connection()
+            return connection.is_usable()
+        except DatabaseError:
+            return False
+
+    def reset(self):
+        with self.lock:
+            self.checked.clear()
+
+
+health = ReplicaHealth()
+
+
+def reads_use_primary():
+    state = _request_state.get()
+    return state is None or state['pinned'] or connections['default'].in_atomic_block
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or model._meta.app_label == 'sessions' or reads_use_primary():
+            return 'default'
+        replicas = [alias for alias in settings.DATABASE_REPLICAS if health.is_healthy(alias)]
+        return random.choice(replicas) if replicas else 'default'
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            # The rest of the request, and the user's next few, read their own write
+            state['pinned'] = state['wrote'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema through replication
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,125 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def search_terms(query):
+    return TOKEN_RE.findall(query.lower())
+
+
+class IcontainsSearchBackend:
+    """Portable fallback: LIKE '%query%' scans over title and description."""
+
+    def search(self, queryset, query):
+        return queryset.filter(Q(title__icontains=query) | Q(description__icontains=query))
+
+    def reindex(self, using='default'):
+        pass
+
+
+class SQLiteFTSSearchBackend(IcontainsSearchBackend):
+    """
+    FTS5 external-content index over Task, created by migration 0009 and
+    kept in sync by triggers on the task table. Every term is matched as a
+    prefix.
+    """
+    table = 'myapp_task_fts'
+
+    _installed_aliases = set()
+
+    @classmethod
+    def is_installed(cls, using='default'):
+        if using not in cls._installed_aliases:
+            with connections[using].cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [cls.table])
+                if cursor.fetchone() is None:
+                    return False
+            cls._installed_aliases.add(using)
+        return True
+
+    def trigger_sql(self):
+        # The same triggers migration 0009 creates
+        task = Task._meta.db_table
+        fts = self.table
+        return [
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {task} BEGIN "
+            f"INSERT INTO {fts}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {task} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, title, description) "
+            f"VALUES ('delete', old.id, old.title, old.description); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF title, description ON {task} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, title, description) "
+            f"VALUES ('delete', old.id, old.title, old.description); "
+            f"INSERT INTO {fts}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        ]
+
+    def ensure_triggers(self, using='default'):
+        """SQLite drops triggers when a migration rebuilds the task table; put them back."""
+        if self.is_installed(using):
+            with connections[using].cursor() as cursor:
+                for sql in self.trigger_sql():
+                    cursor.execute(sql)
+
+    def reindex(self, using='default'):
+        self.ensure_triggers(using)
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')")
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return super().search(queryset, query)
+
+        match = ' '.join(f'"{term}"*' for term in terms)
+        fts = self.table
+        return queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {fts} WHERE {fts} MATCH %s", [match])
+        )
+
+
+class PostgresSearchBackend(IcontainsSearchBackend):
+    """tsvector search backed by migration 0009's GIN expression index on title and description."""
+    config = 'english'
+    index_name = 'myapp_task_search_gin'
+
+    def vector(self):
+        # Must stay the expression the index was built on, or the planner won't use it
+        from django.contrib.postgres.search import SearchVector
+        return SearchVector('title', 'description', config=self.config)
+
+    def reindex(self, using='default'):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"REINDEX INDEX {self.index_name}")
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery
+
+        terms = search_terms(query)
+        if not terms:
+            return super().search(queryset, query)
+
+        tsquery = SearchQuery(
+            ' & '.join(f"{term}:*" for term in terms), config=self.config, search_type='raw'
+        )
+        return queryset.alias(search_vector=self.vector()).filter(search_vector=tsquery)
+
+
+def get_search_backend(using='default'):
+    """Return the configured TASK_SEARCH_BACKEND, or pick one from the database vendor."""
+    if settings.TASK_SEARCH_BACKEND:
+        return import_string(settings.TASK_SEARCH_BACKEND)()
+    vendor = connections[using].vendor
+    if vendor == 'postgresql':
+        return PostgresSearchBackend()
+    if vendor == 'sqlite' and SQLiteFTSSearchBackend.is_installed(using):
+        return SQLiteFTSSearchBackend()
+    return IcontainsSearchBackend()
+
@@ -1,7 +1,13 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, post_migrate, pre_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile
+from django.contrib.auth.signals import user_logged_out
+from django.db import connections
+from .models import UserProfile, Task, TaskEvent, archiving_tasks, purging_user_rows
+from .search import SQLiteFTSSearchBackend
+from .presence import clear_presence
+from .fragments import invalidate_dashboard
+from .live import publish_task_change
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -11,4 +17,62 @@ def create_user_profile(sender, instance, created, **kwargs):
             name=instance.username,
             email=instance.email,
             role='user'
-        )
\ No newline at end of file
+        )
+
+@receiver(pre_save, sender=Task)
+def remember_task_state(sender, instance, raw, **kwargs):
+    if raw or instance._state.adding or hasattr(instance, '_counted_state'):
+        return
+    previous = Task.objects.filter(pk=instance.pk).values_list('user_id', 'is_completed').first()
+    if previous:
+        instance._counted_state = previous
+
+@receiver(post_save, sender=Task)
+def update_task_counters_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_counted_state', None)
+    current = (instance.user_id, instance.is_completed)
+    if previous and previous[0] == current[0]:
+        completed = int(current[1]) - int(previous[1])
+        UserProfile.record_task_change(current[0], completed=completed)
+        TaskEvent.record({1: 'completed', -1: 'reopened'}.get(completed, 'updated'), instance)
+        publish_task_change('updated', instance, current[0], completed=completed)
+    elif previous != current:
+        # A task moving to another owner leaves one dashboard and joins the other
+        if previous:
+            UserProfile.record_task_change(previous[0], total=-1, completed=-int(previous[1]))
+            TaskEvent.record('deleted', instance, previous[0])
+            publish_task_change('deleted', instance, previous[0], total=-1, completed=-int(previous[1]))
+        UserProfile.record_task_change(current[0], total=1, completed=int(current[1]))
+        TaskEvent.record('created', instance)
+        publish_task_change('created', instance, current[0], total=1, completed=int(current[1]))
+    invalidate_dashboard(*{current[0], (previous or current)[0]})
+    instance._counted_state = current
+
+@receiver(post_delete, sender=Task)
+def update_task_counters_on_delete(sender, instance, origin=None, **kwargs):
+    # A cascade from deleting the user, or the batched purge ahead of it, takes the profile,
+    # its counters and its events with it; an archived task still counts and keeps its history
+    if isinstance(origin, User) or purging_user_rows() or archiving_tasks():
+        return
+    UserProfile.record_task_change(instance.user_id, total=-1, completed=-int(instance.is_completed))
+    TaskEvent.record('deleted', instance)
+    publish_task_change('deleted', instance, instance.user_id, total=-1, completed=-int(instance.is_completed))
+    invalidate_dashboard(instance.user_id)
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_dashboard(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_dashboard(instance.user_id)
+
+@receiver(post_migrate)
+def restore_task_search_triggers(sender, using, **kwargs):
+    if sender.name == 'myapp' and connections[using].vendor == 'sqlite':
+        SQLiteFTSSearchBackend().ensure_triggers(using)
+
+@receiver(user_logged_out)
+def mark_user_offline(sender, request, user, **kwargs):
+    if user:
+        clear_presence(user)
@@ -27,4 +27,196 @@ document.addEventListener('DOMContentLoaded', () => {
   window.hidePopup = function() {
     document.getElementById('popup')?.classList.add('hidden');
   };
-});
\ No newline at end of file
+});
+
+// Live task feed: patch task cards and counters from /tasks/events/ instead of reloading
+document.addEventListener('DOMContentLoaded', () => {
+  const dashboard = document.querySelector('[data-live-url]');
+  if (!dashboard || !window.EventSource) return;
+
+  const grid = dashboard.querySelector('.task-grid');
+  const template = document.getElementById('task-card-template');
+  const notifications = dashboard.querySelector('.live-notifications');
+  const status = dashboard.dataset.status;
+  const stats = { completed: 0, total: 0 };
+  const source = new EventSource(dashboard.dataset.liveUrl);
+
+  const dueSoonMs = Number(dashboard.dataset.dueSoonHours || 0) * 3600 * 1000;
+
+  // Same rules as filter_tasks in the dashboard view; the due filters are read against the clock now
+  function matchesFilter(task) {
+    if (status === 'all') return true;
+    if (status === 'completed') return task.is_completed;
+    if (task.is_completed) return false;
+    if (status === 'pending') return true;
+    if (!task.due_date) return false;
+    const untilDue = new Date(task.due_date) - Date.now();
+    return status === 'overdue' ? untilDue < 0 : untilDue >= 0 && untilDue < dueSoonMs;
+  }
+
+  function truncateWords(text, count) {
+    const words = text.split(/\s+/).filter(Boolean);
+    return words.length > count ? words.slice(0, count).join(' ') + ' …' : words.join(' ');
+  }
+
+  // Same reading of the counters as the dashboard view for each status filter
+  function renderStats() {
+    if (!('liveStats' in dashboard.dataset)) return;
+    const completed = status === 'pending' ? 0 : stats.completed;
+    const total = status === 'all' ? stats.total
+      : status === 'completed' ? stats.completed : stats.total - stats.completed;
+    const values = { completed, total, pending: total - completed };
+    dashboard.querySelectorAll('[data-stat]').forEach((el) => {
+      el.textContent = values[el.dataset.stat];
+    });
+  }
+
+  function notify(message, link) {
+    if (!notifications) return;
+    const item = document.createElement('li');
+    item.className = 'activity-item';
+    item.textContent = message;
+    if (link) {
+      const anchor = document.createElement('a');
+      anchor.href = link.href;
+      anchor.textContent = link.text;
+      item.append(' ', anchor);
+    }
+    notifications.prepend(item);
+    dashboard.querySelector('.no-notifications')?.remove();
+  }
+
+  // The template card is task 0; point a clone's links and forms at the real task
+  function retarget(root, id) {
+    root.querySelectorAll('a[href]').forEach((link) => {
+      link.href = link.getAttribute('href').replace('/0/', `/${id}/`);
+    });
+    root.querySelectorAll('form[action]').forEach((form) => {
+      form.action = form.getAttribute('action').replace('/0/', `/${id}/`);
+    });
+  }
+
+  function fillCard(card, task) {
+    card.querySelector('h4').textContent = task.title;
+    card.querySelector('p').textContent = truncateWords(task.description, 20);
+    card.classList.toggle('completed', task.is_completed);
+    if (task.is_completed) {
+      card.querySelector('.task-status').innerHTML = '<i class="fas fa-check-circle"></i> Completed';
+      card.querySelectorAll('.task-actions a').forEach((link) => link.remove());
+    } else if (template) {
+      // Reopened: bring back the pending status and the Mark Done and Edit links from the template
+      const pending = template.content.firstElementChild;
+      card.querySelector('.task-status').innerHTML = pending.querySelector('.task-status').innerHTML;
+      const actions = card.querySelector('.task-actions');
+      if (!actions.querySelector('a')) {
+        const links = document.createElement('div');
+        pending.querySelectorAll('.task-actions a').forEach((link) => links.append(link.cloneNode(true)));
+        retarget(links, task.id);
+        bindLinks(links);
+        actions.prepend(...links.children);
+      }
+    }
+  }
+
+  function createCard(task) {
+    const card = template.content.firstElementChild.cloneNode(true);
+    card.dataset.taskId = task.id;
+    retarget(card, task.id);
+    const formatDate = (value) => new Date(value).toLocaleString('en-US', {
+      month: 'short', day: '2-digit', year: 'numeric', hour: '2-digit', minute: '2-digit', hour12: false,
+    });
+    card.querySelector('small').textContent = `Created: ${formatDate(task.created_at)}`;
+    if (task.due_date) {
+      const due = document.createElement('small');
+      due.className = 'due-date';
+      due.textContent = `Due: ${formatDate(task.due_date)}`;
+      card.querySelector('small').after(due);
+    }
+    fillCard(card, task);
+    bindActions(card);
+    return card;
+  }
+
+  function applyTask(event) {
+    const task = event.task;
+    const card = grid?.querySelector(`[data-task-id="${task.id}"]`);
+    if (event.action === 'deleted' || !matchesFilter(task)) {
+      card?.remove();
+    } else if (card) {
+      fillCard(card, task);
+    } else if (event.action === 'created' && 'liveInsert' in dashboard.dataset && grid && template) {
+      grid.prepend(createCard(task));
+      dashboard.querySelector('.no-tasks')?.remove();
+    }
+    stats.completed += event.delta.completed;
+    stats.total += event.delta.total;
+    renderStats();
+
+    const verb = event.action !== 'updated' ? event.action
+      : event.delta.completed > 0 ? 'completed' : event.delta.completed < 0 ? 'reopened' : 'updated';
+    notify(`Task '${task.title}' ${verb}`);
+  }
+
+  source.addEventListener('message', (message) => {
+    const event = JSON.parse(message.data);
+    if (event.type === 'stats') {
+      // Sent on every (re)connect, so counters recover from anything missed while away
+      stats.completed = event.completed;
+      stats.total = event.total;
+      renderStats();
+    } else if (event.type === 'task') {
+      applyTask(event);
+    } else if (event.type === 'refresh') {
+      notify('Tasks were changed in bulk.', { href: window.location.href, text: 'Reload' });
+    }
+  });
+
+  // While the feed is connected, task actions go through fetch and the page updates from the
+  // resulting event; otherwise they fall back to the normal full-page request
+  function send(url, options = {}) {
+    return fetch(url, { credentials: 'same-origin', headers: { Accept: 'application/json' }, ...options })
+      .then((response) => {
+        if (!response.ok || response.redirected) throw new Error(`HTTP ${response.status}`);
+      });
+  }
+
+  function bindLinks(root) {
+    root.querySelectorAll('a.success-btn').forEach((link) => {
+      link.addEventListener('click', (e) => {
+        if (source.readyState !== EventSource.OPEN) return;
+        e.preventDefault();
+        send(link.href).catch(() => { window.location = link.href; });
+      });
+    });
+  }
+
+  function bindActions(root) {
+    root.querySelectorAll('.task-actions').forEach(bindLinks);
+    root.querySelectorAll('.task-actions form').forEach((form) => {
+      form.addEventListener('submit', (e) => {
+        if (source.readyState !== EventSource.OPEN) return;
+        e.preventDefault();
+        send(form.action, { method: 'POST', body: new FormData(form) }).catch(() => form.submit());
+      });
+    });
+  }
+
+  bindActions(dashboard);
+
+  const addForm = dashboard.querySelector('.task-form form');
+  addForm?.addEventListener('submit', (e) => {
+    if (source.readyState !== EventSource.OPEN) return;
+    e.preventDefault();
+    const body = new FormData(addForm);
+    body.append('add_task', '1');
+    send(window.location.href, { method: 'POST', body })
+      .then(() => addForm.reset())
+      .catch(() => {
+        const flag = document.createElement('input');
+        flag.type = 'hidden';
+        flag.name = 'add_task';
+        addForm.append(flag);
+        addForm.submit();
+      });
+  });
+});
@@ -0,0 +1,13 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+
+def streaming_response(request, generate, agenerate, **kwargs):
+    """
+    A StreamingHttpResponse over ``agenerate()`` under ASGI and ``generate()``
+    under WSGI. Each server only streams its own kind: Django's ASGI handler
+    drains a sync iterator into a list before sending anything, and its WSGI
+    handler steps an async one through async_to_sync.
+    """
+    stream = agenerate() if isinstance(request, ASGIRequest) else generate()
+    return StreamingHttpResponse(stream, **kwargs)
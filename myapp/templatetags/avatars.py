@@ -0,0 +1,36 @@
+from django import template
+from django.conf import settings
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+def thumbnail_size(size):
+    """Smallest generated thumbnail at least ``size`` pixels wide, else the largest."""
+    sizes = sorted(settings.AVATAR_SIZES)
+    return next((candidate for candidate in sizes if candidate >= size), sizes[-1])
+
+
+@register.simple_tag
+def avatar(profile, size=48):
+    """
+    A ``<picture>`` serving the WebP thumbnail with a JPEG fallback, or the raw
+    upload while it is still being processed. Renders nothing without an avatar.
+    """
+    size = int(size)
+    alt = f"{profile.name}'s avatar"
+    if profile.avatar_hash:
+        source = thumbnail_size(size)
+        return format_html(
+            '<picture class="avatar">'
+            '<source srcset="{}" type="image/webp">'
+            '<img src="{}" width="{}" height="{}" alt="{}" loading="lazy" decoding="async">'
+            '</picture>',
+            profile.avatar_url(source, 'webp'), profile.avatar_url(source, 'jpg'), size, size, alt,
+        )
+    if profile.avatar:
+        return format_html(
+            '<img class="avatar" src="{}" width="{}" height="{}" alt="{}" loading="lazy">',
+            profile.avatar.url, size, size, alt,
+        )
+    return ''
@@ -1,3 +1,1373 @@
-from django.test import TestCase
+import json
+import os
+import runpy
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.contrib.sessions.models import Session
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import now
+from PIL import Image
+
+from .fragments import GLOBAL_SCOPE, version_key
+from .metrics import request_metric_names, store as metrics_store
+from .middleware import ReplicaRoutingMiddleware
+from .jobs import JOBS, claim_jobs, enqueue, requeue_stale_jobs, run_job
+from .live import REFRESH, channel_for, get_broker
+from .models import Job, Task, TaskArchive, TaskEvent, UserPresence, UserProfile, batch_task_changes
+from .pagination import decode_cursor, encode_cursor, paginate_tasks
+from .search import SQLiteFTSSearchBackend, get_search_backend
+from .presence import online_user_count
+from .reminders import ReminderScheduler
+from .routers import PrimaryReplicaRouter, health as replica_health
+from .testing import query_budget
+from .views import recent_activity
+
+
+class DashboardTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pass12345')
+        self.client.force_login(self.user)
+
+
+class TaskPaginationTests(DashboardTestCase):
+    def test_cursor_round_trip(self):
+        task = Task.objects.create(user=self.user, title='one')
+        self.assertEqual(decode_cursor(encode_cursor(task)), (task.created_at, task.pk))
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+
+    def test_pages_cover_every_task_once(self):
+        Task.objects.bulk_create([Task(user=self.user, title=f'task {i}') for i in range(7)])
+        seen, cursor = [], None
+        while True:
+            page, cursor = paginate_tasks(Task.objects.all(), cursor, page_size=3)
+            seen.extend(task.pk for task in page)
+            if cursor is None:
+                break
+        self.assertEqual(seen, list(Task.objects.order_by('-created_at', '-id').values_list('pk', flat=True)))
+
+    @override_settings(TASKS_PAGE_SIZE=2)
+    def test_dashboard_renders_one_page(self):
+        for i in range(3):
+            Task.objects.create(user=self.user, title=f'task {i}')
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(len(response.context['user_tasks']), 2)
+        self.assertIsNotNone(response.context['next_cursor'])
+        self.assertEqual(response.context['tasks_total'], 3)
+
+    def test_dashboard_streaming_mode(self):
+        Task.objects.bulk_create([Task(user=self.user, title=f'task {i}') for i in range(3)])
+        response = self.client.get(reverse('dashboard'), {'stream': '1'})
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        for i in range(3):
+            self.assertIn(f'task {i}', content)
+
+
+class TaskCounterTests(DashboardTestCase):
+    def counters(self, user=None):
+        profile = UserProfile.objects.get(user=user or self.user)
+        return profile.task_count, profile.completed_task_count, profile.pending_task_count
+
+    def test_counters_follow_task_lifecycle(self):
+        task = Task.objects.create(user=self.user, title='write report')
+        self.assertEqual(self.counters(), (1, 0, 1))
+
+        self.client.get(reverse('complete_task', args=[task.id]))
+        self.assertEqual(self.counters(), (1, 1, 0))
+
+        self.client.post(reverse('delete_task', args=[task.id]))
+        self.assertEqual(self.counters(), (0, 0, 0))
+
+    def test_reassigning_a_task_moves_its_count(self):
+        bob = User.objects.create_user('bob', 'bob@example.com', 'pass12345')
+        task = Task.objects.create(user=self.user, title='handover', is_completed=True)
+        task = Task.objects.get(pk=task.pk)
+        task.user = bob
+        task.save()
+        self.assertEqual(self.counters(), (0, 0, 0))
+        self.assertEqual(self.counters(bob), (1, 1, 0))
+
+    def test_rebuild_command_repairs_drift(self):
+        Task.objects.bulk_create([Task(user=self.user, title='imported', is_completed=True)])
+        self.assertEqual(self.counters(), (0, 0, 0))
+        call_command('rebuild_task_counters', stdout=StringIO())
+        self.assertEqual(self.counters(), (1, 1, 0))
+
+    def test_dashboard_stats_use_counters(self):
+        Task.objects.create(user=self.user, title='a')
+        Task.objects.create(user=self.user, title='b', is_completed=True)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual((response.context['tasks_completed'], response.context['tasks_total']), (1, 2))
+        response = self.client.get(reverse('dashboard'), {'status': 'pending'})
+        self.assertEqual((response.context['tasks_completed'], response.context['tasks_total']), (0, 1))
+
+
+class TaskSearchTests(DashboardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.report = Task.objects.create(user=self.user, title='Quarterly report', description='finance numbers')
+        self.groceries = Task.objects.create(user=self.user, title='Groceries', description='buy reports binder')
+        self.other = Task.objects.create(user=self.user, title='Walk the dog')
+
+    def test_sqlite_uses_fts_index(self):
+        self.assertIsInstance(get_search_backend(), SQLiteFTSSearchBackend)
+
+    def test_prefix_matching(self):
+        results = get_search_backend().search(Task.objects.order_by('id'), 'repo')
+        self.assertEqual([task.pk for task in results], [self.report.pk, self.groceries.pk])
+
+    def test_index_follows_updates_and_deletes(self):
+        backend = get_search_backend()
+        self.other.title = 'Walk to the finance office'
+        self.other.save()
+        self.report.delete()
+        self.assertEqual(list(backend.search(Task.objects.all(), 'finance')), [self.other])
+
+    def test_reindex_command(self):
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(list(get_search_backend().search(Task.objects.all(), 'dog')), [self.other])
+
+    def test_dashboard_search(self):
+        response = self.client.get(reverse('dashboard'), {'task_query': 'grocer'})
+        self.assertEqual(response.context['user_tasks'], [self.groceries])
+
+
+class PresenceTests(DashboardTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+    def test_requests_mark_user_online(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['users_online'], 1)
+
+    def test_stale_users_fall_out_of_window(self):
+        bob = User.objects.create_user('bob', 'bob@example.com', 'pass12345')
+        UserPresence.objects.create(user=bob, last_seen=now() - timedelta(hours=1))
+        self.client.get(reverse('dashboard'))
+        self.assertEqual(online_user_count(), 1)
+        self.assertEqual(online_user_count(window=timedelta(days=1)), 2)
+
+    def test_writes_are_throttled(self):
+        self.client.get(reverse('dashboard'))
+        first_seen = UserPresence.objects.get(user=self.user).last_seen
+        self.client.get(reverse('dashboard'))
+        self.assertEqual(UserPresence.objects.get(user=self.user).last_seen, first_seen)
+
+    def test_logout_marks_user_offline(self):
+        self.client.get(reverse('dashboard'))
+        self.client.get(reverse('logout'))
+        self.assertEqual(online_user_count(), 0)
+
+
+class DashboardCacheTests(DashboardTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.task = Task.objects.create(user=self.user, title='cached task')
+
+    def stats(self, **params):
+        response = self.client.get(reverse('dashboard'), params)
+        return response.context['tasks_completed'], response.context['tasks_total']
+
+    def test_repeat_load_reads_fragments_from_cache(self):
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(reverse('dashboard'))
+        with CaptureQueriesContext(connection) as warm:
+            self.client.get(reverse('dashboard'))
+        self.assertLess(len(warm), len(cold))
+        self.assertFalse(any('myapp_userpresence' in query['sql'] for query in warm.captured_queries))
+
+    def test_task_changes_invalidate_the_owner(self):
+        self.assertEqual(self.stats(), (0, 1))
+        self.client.post(reverse('complete_task', args=[self.task.id]))
+        self.assertEqual(self.stats(), (1, 1))
+        self.task.refresh_from_db()
+        self.task.delete()
+        self.assertEqual(self.stats(), (0, 0))
+
+    def test_query_params_are_cached_separately(self):
+        self.client.post(reverse('complete_task', args=[self.task.id]))
+        self.assertEqual(self.stats(status='pending'), (0, 0))
+        self.assertEqual(self.stats(status='completed'), (1, 1))
+
+    def test_other_users_changes_keep_the_cache(self):
+        version = cache.get(version_key(self.user.pk))
+        bob = User.objects.create_user('bob', 'bob@example.com', 'pass12345')
+        Task.objects.create(user=bob, title='bob task')
+        self.assertEqual(cache.get(version_key(self.user.pk)), version)
+        self.assertNotEqual(cache.get(version_key(GLOBAL_SCOPE)), version)
+
+    def test_admin_user_table_follows_profile_edits(self):
+        UserProfile.objects.filter(user=self.user).update(role='admin')
+        self.assertContains(self.client.get(reverse('dashboard')), 'alice@example.com')
+        profile = UserProfile.objects.get(user=self.user)
+        profile.email = 'alice@tasksync.test'
+        profile.save()
+        response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, 'alice@tasksync.test')
+        self.assertNotContains(response, 'alice@example.com')
+
+
+class TaskEventTests(DashboardTestCase):
+    def actions(self):
+        return list(TaskEvent.objects.order_by('id').values_list('action', flat=True))
+
+    def test_task_changes_are_logged(self):
+        task = Task.objects.create(user=self.user, title='logged')
+        task.title = 'renamed'
+        task.save()
+        task.is_completed = True
+        task.save()
+        task.is_completed = False
+        task.save()
+        task.delete()
+        self.assertEqual(self.actions(), ['created', 'updated', 'completed', 'reopened', 'deleted'])
+        self.assertEqual(TaskEvent.objects.last().title, 'renamed')
+
+    def test_batched_changes_insert_events_together(self):
+        with CaptureQueriesContext(connection) as queries, batch_task_changes():
+            for i in range(3):
+                Task.objects.create(user=self.user, title=f'task {i}')
+        inserts = [query for query in queries.captured_queries if 'INSERT INTO "myapp_taskevent"' in query['sql']]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(self.actions(), ['created'] * 3)
+
+    def test_bulk_actions_are_logged(self):
+        tasks = [Task.objects.create(user=self.user, title=f'task {i}') for i in range(2)]
+        ids = [task.id for task in tasks]
+        for action, payload in [('complete', {'ids': ids[:1]}), ('edit', {'ids': ids, 'changes': {'title': 'batched'}})]:
+            self.client.post(reverse('bulk_tasks', args=[action]), json.dumps(payload), content_type='application/json')
+        self.assertEqual(self.actions(), ['created', 'created', 'completed', 'updated', 'updated'])
+        self.assertEqual(TaskEvent.objects.last().title, 'batched')
+
+    def test_feed_is_one_query_and_ignores_filters(self):
+        Task.objects.create(user=self.user, title='first')
+        bob = User.objects.create_user('bob', 'bob@example.com', 'pass12345')
+        Task.objects.create(user=bob, title='not mine')
+        with self.assertNumQueries(1):
+            activities = async_to_sync(recent_activity)(self.user, False)
+        self.assertEqual([activity['message'] for activity in activities], ["Task 'first' created by alice"])
+        response = self.client.get(reverse('dashboard'), {'status': 'completed'})
+        self.assertEqual(len(response.context['recent_activities']), 1)
+
+    def test_compaction_applies_age_and_per_user_cap(self):
+        for i in range(5):
+            Task.objects.create(user=self.user, title=f'task {i}')
+        TaskEvent.objects.filter(title='task 0').update(timestamp=now() - timedelta(days=100))
+        out = StringIO()
+        call_command('compact_task_events', days=90, keep_per_user=3, batch_size=1, stdout=out)
+        self.assertIn('Removed 2 task event(s).', out.getvalue())
+        self.assertEqual(sorted(TaskEvent.objects.values_list('title', flat=True)), ['task 2', 'task 3', 'task 4'])
+
+
+class ListReminderBackend:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, tasks):
+        self.sent += [task.title for task in tasks]
+
+
+class DueDateTests(DashboardTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.now = now()
+
+    def task(self, title, **due):
+        return Task.objects.create(user=self.user, title=title, due_date=self.now + timedelta(**due))
+
+    def test_form_saves_due_date(self):
+        self.client.post(reverse('dashboard'), {'add_task': '1', 'title': 'dated', 'due_date': '2030-01-02T09:30'})
+        self.assertEqual(Task.objects.get(title='dated').due_date.year, 2030)
+
+    def test_overdue_and_due_soon_filters(self):
+        self.task('late', hours=-1)
+        self.task('soon', hours=2)
+        self.task('later', days=3)
+        done = self.task('done late', hours=-2)
+        done.is_completed = True
+        done.save()
+        for status, titles in [('overdue', ['late']), ('due_soon', ['soon'])]:
+            response = self.client.get(reverse('dashboard'), {'status': status})
+            self.assertEqual([task.title for task in response.context['user_tasks']], titles)
+            self.assertEqual(response.context['tasks_total'], 1)
+
+    def test_scheduler_fires_each_reminder_once(self):
+        backend = ListReminderBackend()
+        scheduler = ReminderScheduler(backend)
+        self.task('now', minutes=30)
+        later = self.task('later', minutes=90)
+        scheduler.refresh(self.now)
+        self.assertEqual(scheduler.fire(self.now), 1)
+        self.assertEqual(scheduler.next_wakeup(), later.due_date - timedelta(minutes=60))
+
+        # Moving a deadline and adding a task reach the heap through the event log, not a rescan
+        later.due_date = self.now + timedelta(minutes=100)
+        later.save()
+        self.task('new', minutes=70)
+        # Latest event id, the new events, the changed tasks and the newly covered slice of the index
+        with self.assertNumQueries(4):
+            scheduler.refresh(self.now + timedelta(seconds=5))
+        self.assertEqual(scheduler.fire(self.now + timedelta(minutes=35)), 1)
+        self.assertEqual(scheduler.fire(self.now + timedelta(minutes=45)), 1)
+        self.assertEqual(backend.sent, ['now', 'new', 'later'])
+        self.assertEqual(scheduler.fire(self.now + timedelta(hours=3)), 0)
+
+    def test_completed_tasks_are_not_reminded(self):
+        backend = ListReminderBackend()
+        scheduler = ReminderScheduler(backend)
+        task = self.task('done', minutes=30)
+        scheduler.refresh(self.now)
+        task.is_completed = True
+        task.save()
+        self.assertEqual(scheduler.fire(self.now), 0)
+
+    def test_command_writes_to_file_backend(self):
+        path = Path(self.enterContext(tempfile.TemporaryDirectory())) / 'reminders.jsonl'
+        self.task('due', minutes=10)
+        with override_settings(TASK_REMINDER_BACKEND='myapp.reminders.FileReminderBackend', TASK_REMINDER_FILE=path):
+            call_command('send_reminders', '--once', stdout=StringIO())
+            call_command('send_reminders', '--once', stdout=StringIO())
+        [line] = path.read_text().splitlines()
+        self.assertEqual(json.loads(line)['title'], 'due')
+
+
+class TaskArchiveTests(DashboardTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.old = []
+        for i, (title, done) in enumerate([('old report', True), ('old open', False), ('old notes', True)]):
+            task = Task.objects.create(user=self.user, title=title, is_completed=done)
+            Task.objects.filter(pk=task.pk).update(created_at=now() - timedelta(days=200, minutes=i))
+            self.old.append(task)
+        self.recent = Task.objects.create(user=self.user, title='recent report', is_completed=True)
+
+    def archive(self):
+        out = StringIO()
+        call_command('archive_tasks', '--days', '90', '--batch-size', '1', stdout=out)
+        return out.getvalue()
+
+    def titles(self, **params):
+        response = self.client.get(reverse('dashboard'), params)
+        return [task.title for task in response.context['user_tasks']]
+
+    def test_moves_only_old_completed_tasks(self):
+        self.assertIn('Archived 2 task(s).', self.archive())
+        self.assertEqual(sorted(TaskArchive.objects.values_list('title', flat=True)), ['old notes', 'old report'])
+        self.assertEqual(sorted(Task.objects.values_list('title', flat=True)), ['old open', 'recent report'])
+        # Totals and history are untouched, and the counters still reconcile
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.task_count, profile.completed_task_count), (4, 3))
+        self.assertFalse(TaskEvent.objects.filter(action='deleted').exists())
+        out = StringIO()
+        call_command('rebuild_task_counters', '--dry-run', stdout=out)
+        self.assertIn('0 profile(s) would be corrected.', out.getvalue())
+
+    def test_counts_only_the_tasks_it_moved(self):
+        gone = Task.objects.create(user=self.user, title='deleted meanwhile', is_completed=True)
+        gone.delete()
+        ids = [self.old[0].pk, self.old[1].pk, gone.pk]
+        self.assertEqual(TaskArchive.archive(ids), (1, {self.user.pk}))
+        self.assertEqual(list(TaskArchive.objects.values_list('id', flat=True)), [self.old[0].pk])
+
+    def test_dashboard_reads_the_archive_only_when_asked(self):
+        self.archive()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.titles(status='completed'), ['recent report'])
+        self.assertFalse(any('myapp_taskarchive' in query['sql'] for query in queries.captured_queries))
+        self.assertEqual(self.titles(status='completed', archived='1'), ['recent report', 'old report', 'old notes'])
+        self.assertEqual(self.titles(task_query='report', archived='1'), ['recent report', 'old report'])
+        self.assertEqual(self.titles(status='pending', archived='1'), ['old open'])
+
+    def test_cursor_pages_through_both_tables(self):
+        self.archive()
+        titles, params = [], {'archived': '1', 'page_size': 1}
+        while True:
+            response = self.client.get(reverse('dashboard'), params)
+            titles += [task.title for task in response.context['user_tasks']]
+            if not response.context['next_cursor']:
+                break
+            params['cursor'] = response.context['next_cursor']
+        self.assertEqual(titles, ['recent report', 'old report', 'old open', 'old notes'])
+        streamed = b''.join(self.client.get(reverse('dashboard'), {'archived': '1', 'stream': '1'}).streaming_content)
+        self.assertEqual(streamed.count(b'data-task-id='), 4)
+
+    def test_api_lists_archived_tasks_on_request(self):
+        self.archive()
+        results = self.client.get(reverse('api_task_list'), {'archived': '1', 'status': 'completed'}).json()['results']
+        self.assertEqual([task['archived'] for task in results], [False, True, True])
+
+
+class AsyncViewTests(DashboardTestCase):
+    """The dashboard and task views served through the ASGI handler."""
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.async_client.force_login(self.user)
+        self.task = Task.objects.create(user=self.user, title='async task')
+
+    async def test_dashboard(self):
+        response = await self.async_client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user_tasks'], [self.task])
+        self.assertEqual((response.context['tasks_completed'], response.context['tasks_total']), (0, 1))
+        self.assertEqual(response.context['users_online'], 1)
+
+    async def test_dashboard_streaming_mode(self):
+        response = await self.async_client.get(reverse('dashboard'), {'stream': '1'})
+        content = b''.join([chunk async for chunk in response])
+        self.assertIn(b'async task', content)
+
+    async def test_task_mutations(self):
+        await self.async_client.post(reverse('edit_task', args=[self.task.id]), {'title': 'renamed'})
+        await self.async_client.get(reverse('complete_task', args=[self.task.id]))
+        task = await Task.objects.aget(pk=self.task.pk)
+        self.assertEqual((task.title, task.is_completed), ('renamed', True))
+        await self.async_client.post(reverse('delete_task', args=[self.task.id]))
+        self.assertFalse(await Task.objects.filter(pk=self.task.pk).aexists())
+        profile = await UserProfile.objects.aget(user=self.user)
+        self.assertEqual((profile.task_count, profile.completed_task_count), (0, 0))
+
+
+@override_settings(LIVE_EVENTS=True, LIVE_EVENTS_KEEPALIVE_SECONDS=0)
+class LiveEventTests(DashboardTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+    def subscribe(self, scope):
+        subscription = get_broker().subscribe([channel_for(scope)])
+        self.addCleanup(subscription.close)
+        return subscription
+
+    def test_task_changes_publish_deltas_to_the_owner_and_admins(self):
+        mine, admins = self.subscribe(self.user.pk), self.subscribe(GLOBAL_SCOPE)
+        bob = self.subscribe(User.objects.create_user('bob', 'bob@example.com', 'pass12345').pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(user=self.user, title='live')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('complete_task', args=[task.id]), HTTP_ACCEPT='application/json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('delete_task', args=[task.id]), HTTP_ACCEPT='application/json')
+        events = mine.get(0)
+        self.assertEqual([(event['action'], event['delta']) for event in events], [
+            ('created', {'total': 1, 'completed': 0}),
+            ('updated', {'total': 0, 'completed': 1}),
+            ('deleted', {'total': -1, 'completed': -1}),
+        ])
+        self.assertEqual(events[1]['task'], {**events[1]['task'], 'id': task.id, 'title': 'live', 'is_completed': True})
+        self.assertEqual(admins.get(0), events)
+        self.assertEqual(bob.get(0), [])
+
+    def test_nothing_is_published_for_a_rolled_back_change(self):
+        mine = self.subscribe(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Task.objects.create(user=self.user, title='rolled back')
+                raise RuntimeError
+        self.assertEqual(mine.get(0), [])
+
+    @override_settings(LIVE_EVENTS_QUEUE_SIZE=2)
+    def test_slow_clients_get_a_refresh_instead_of_the_backlog(self):
+        mine = self.subscribe(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(3):
+                Task.objects.create(user=self.user, title=f'task {i}')
+        self.assertEqual(mine.get(0), [REFRESH])
+
+    def test_event_stream_opens_with_stats_then_relays_events(self):
+        Task.objects.create(user=self.user, title='done', is_completed=True)
+        response = self.client.get(reverse('task_events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = iter(response.streaming_content)
+        self.assertIn(b'data: {"type": "stats", "completed": 1, "total": 1}', next(stream))
+        self.assertEqual(next(stream), b': keepalive\n\n')
+        get_broker().publish(channel_for(self.user.pk), {'type': 'refresh'})
+        self.assertEqual(next(stream), b'data: {"type": "refresh"}\n\n')
+        response.close()
+
+    async def test_event_stream_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('task_events'))
+        stream = aiter(response.streaming_content)
+        self.assertIn(b'"type": "stats"', await anext(stream))
+        get_broker().publish(channel_for(self.user.pk), {'type': 'refresh'})
+        self.assertEqual(await anext(stream), b'data: {"type": "refresh"}\n\n')
+        await stream.aclose()
+
+    def test_fetch_requests_skip_the_redirect(self):
+        response = self.client.post(reverse('dashboard'), {'add_task': '1', 'title': 'x'}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 204)
+        response = self.client.post(reverse('dashboard'), {'add_task': '1', 'title': ''}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertContains(self.client.get(reverse('dashboard')), 'id="task-card-template"')
+
+    def test_card_template_carries_the_pending_actions(self):
+        # scripts.js clones these to restore a card when its task is reopened
+        content = self.client.get(reverse('dashboard'), {'status': 'completed'}).content.decode()
+        template = content[content.index('id="task-card-template"'):content.index('</template>')]
+        self.assertIn('<i class="fas fa-clock"></i> Pending', template)
+        self.assertIn(f'href="{reverse("complete_task", args=[0])}"', template)
+        self.assertIn(f'href="{reverse("edit_task", args=[0])}"', template)
+
+    def test_due_filters_pass_the_due_soon_window_to_the_script(self):
+        response = self.client.get(reverse('dashboard'), {'status': 'due_soon'})
+        self.assertContains(response, f'data-status="due_soon" data-due-soon-hours="{settings.TASK_DUE_SOON_HOURS}"')
+        self.assertNotContains(response, 'data-live-stats')
+
+    @override_settings(LIVE_EVENTS=False)
+    def test_disabled_feed_tells_the_browser_to_stop(self):
+        self.assertEqual(self.client.get(reverse('task_events')).status_code, 204)
+        self.assertNotContains(self.client.get(reverse('dashboard')), 'data-live-url')
+
+
+class GunicornConfigTests(SimpleTestCase):
+    def load(self, **env):
+        names = ('SERVER_MODE', 'WEB_CONCURRENCY', 'GUNICORN_THREADS', 'GUNICORN_PRELOAD', 'GUNICORN_MAX_REQUESTS',
+                 'CACHE_BACKEND')
+        clean = {name: value for name, value in os.environ.items() if name not in names}
+        with mock.patch.dict(os.environ, {**clean, **env}, clear=True), \
+                mock.patch('multiprocessing.cpu_count', return_value=4):
+            return runpy.run_path(str(settings.BASE_DIR / 'gunicorn.conf.py'))
+
+    def test_defaults_scale_with_cpu_count(self):
+        config = self.load(CACHE_BACKEND='redis')
+        self.assertEqual((config['workers'], config['threads']), (9, 8))
+        self.assertEqual((config['worker_class'], config['wsgi_app']), ('gthread', 'djangs.wsgi:application'))
+        self.assertTrue(config['preload_app'])
+        self.assertEqual((config['max_requests'], config['max_requests_jitter']), (1000, 100))
+
+    def test_one_worker_without_a_shared_cache(self):
+        self.assertEqual(self.load()['workers'], 1)
+        self.assertEqual(self.load(CACHE_BACKEND='file')['workers'], 9)
+
+    def test_environment_overrides(self):
+        config = self.load(SERVER_MODE='asgi', WEB_CONCURRENCY='2', GUNICORN_PRELOAD='0', GUNICORN_MAX_REQUESTS='0')
+        self.assertEqual(config['worker_class'], 'uvicorn_worker.UvicornWorker')
+        self.assertEqual(config['workers'], 2)
+        self.assertFalse(config['preload_app'])
+        self.assertEqual(config['max_requests'], 0)
+
+
+class DatabaseSettingsTests(TestCase):
+    def load_settings(self, **env):
+        names = ('DATABASE_URL', 'SQLITE_TUNING', 'SQLITE_WAL')
+        clean = {name: value for name, value in os.environ.items() if name not in names}
+        with mock.patch.dict(os.environ, {**clean, **env}, clear=True):
+            return runpy.run_path(str(settings.BASE_DIR / 'djangs' / 'settings.py'))
+
+    def test_wal_is_opt_in(self):
+        options = self.load_settings()['DATABASES']['default']['OPTIONS']
+        self.assertNotIn('journal_mode', options['init_command'])
+        options = self.load_settings(SQLITE_WAL='True')['DATABASES']['default']['OPTIONS']
+        self.assertIn('PRAGMA journal_mode=WAL;', options['init_command'])
+
+    def test_sqlite_connections_are_tuned(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("SQLite only")
+        wal = 'journal_mode=WAL' in settings.DATABASES['default']['OPTIONS']['init_command']
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            # NORMAL with WAL, else SQLite's FULL default
+            self.assertEqual(cursor.fetchone()[0], 1 if wal else 2)
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], settings.DATABASES['default']['OPTIONS']['timeout'] * 1000)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRoutingTests(SimpleTestCase):
+    """Routing decisions only; the replica aliases are never connected to."""
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.down = set()
+        replica_health.reset()
+        self.enterContext(mock.patch.object(replica_health, 'probe', lambda alias: alias not in self.down))
+        self.addCleanup(replica_health.reset)
+
+    def serve(self, method='get', cookies=None, write=False):
+        """Run a request through the middleware; return where its reads went and the response."""
+        reads = []
+
+        def view(request):
+            reads.append(self.router.db_for_read(Task))
+            if write:
+                self.router.db_for_write(Task)
+                reads.append(self.router.db_for_read(Task))
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)('/')
+        request.COOKIES.update(cookies or {})
+        return reads, ReplicaRoutingMiddleware(view)(request)
+
+    def test_request_reads_go_to_replicas(self):
+        reads, response = self.serve()
+        self.assertIn(reads[0], ['replica1', 'replica2'])
+        self.assertNotIn(settings.DATABASE_REPLICA_STICKY_COOKIE, response.cookies)
+        self.assertEqual(self.router.db_for_write(Task), 'default')
+        # Outside a request (workers, commands) and for sessions, reads stay on the primary
+        self.assertEqual(self.router.db_for_read(Task), 'default')
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+
+    def test_writes_pin_the_request_and_the_next_ones(self):
+        reads, response = self.serve(write=True)
+        self.assertEqual(reads[1], 'default')
+        cookie = response.cookies[settings.DATABASE_REPLICA_STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.DATABASE_REPLICA_STICKY_SECONDS)
+        reads, _ = self.serve(cookies={settings.DATABASE_REPLICA_STICKY_COOKIE: '1'})
+        self.assertEqual(reads, ['default'])
+        reads, _ = self.serve(method='post')
+        self.assertEqual(reads, ['default'])
+
+    def test_unhealthy_replicas_are_skipped(self):
+        self.down = {'replica1'}
+        with self.assertLogs('myapp.routers', 'WARNING'):
+            self.assertEqual({self.serve()[0][0] for _ in range(10)}, {'replica2'})
+        replica_health.reset()
+        self.down = {'replica1', 'replica2'}
+        with self.assertLogs('myapp.routers', 'WARNING') as logs:
+            self.assertEqual(self.serve()[0], ['default'])
+        self.assertEqual(len(logs.output), 2)
+        # A failed replica isn't retried until DATABASE_REPLICA_RETRY_SECONDS have passed
+        self.down = set()
+        self.assertEqual(self.serve()[0], ['default'])
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica1', 'myapp'))
+        self.assertTrue(self.router.allow_migrate('default', 'myapp'))
+
+
+@override_settings(INSTRUMENTATION=True)
+class InstrumentationTests(DashboardTestCase):
+    def setUp(self):
+        cache.clear()
+        metrics_store.reset(request_metric_names())
+        super().setUp()
+        Task.objects.create(user=self.user, title='timed task')
+
+    def test_server_timing_and_log_line(self):
+        with self.assertLogs('gunicorn.access', 'INFO') as logs:
+            response = self.client.get(reverse('dashboard'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+$')
+        line = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((line['url_name'], line['status']), ('dashboard', 200))
+        self.assertGreater(line['db_queries'], 0)
+        self.assertGreater(line['template_ms'], 0)
+        self.assertEqual(line['bytes'], len(response.content))
+
+    def test_metrics_endpoint_is_admin_only(self):
+        self.assertRedirects(self.client.get(reverse('request_metrics')), reverse('dashboard'),
+                             fetch_redirect_response=False)
+        UserProfile.objects.filter(user=self.user).update(role='admin')
+        for _ in range(3):
+            self.client.get(reverse('dashboard'))
+        report = self.client.get(reverse('request_metrics')).json()['urls']
+        self.assertEqual(report['dashboard']['count'], 3)
+        self.assertLessEqual(report['dashboard']['p50_ms'], report['dashboard']['p99_ms'])
+        self.assertGreater(report['dashboard']['avg_queries'], 0)
+
+    async def test_asgi_requests_are_measured(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('dashboard'))
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+
+    @override_settings(INSTRUMENTATION=False)
+    def test_disabled_by_default(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('dashboard')))
+
+
+def image_upload(name='avatar.png', size=(600, 400), mode='RGBA', image_format='PNG'):
+    buffer = BytesIO()
+    Image.new(mode, size, 'red').save(buffer, image_format)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{image_format.lower()}')
+
+
+class AvatarTests(DashboardTestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        overrides = override_settings(MEDIA_ROOT=media.name, AVATAR_PROCESSING='sync', AVATAR_SIZES=[48, 128])
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.media = Path(media.name)
+        super().setUp()
+        UserProfile.objects.filter(user=self.user).update(role='admin')
+
+    def upload(self, avatar):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('edit_profile', args=[self.user.id]), {
+                'name': 'Alice', 'email': 'alice@example.com', 'role': 'admin', 'avatar': avatar,
+            })
+
+    def test_upload_is_replaced_by_hashed_derivatives(self):
+        self.upload(image_upload())
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual(len(profile.avatar_hash), 16)
+        self.assertEqual(profile.avatar.name, f'avatars/{profile.avatar_hash}/original.jpg')
+        files = sorted(path.name for path in (self.media / 'avatars' / profile.avatar_hash).iterdir())
+        self.assertEqual(files, ['128.jpg', '128.webp', '48.jpg', '48.webp', 'original.jpg'])
+        self.assertEqual([path.name for path in (self.media / 'avatars').iterdir()], [profile.avatar_hash])
+        with Image.open(self.media / profile.avatar_url(48, 'webp').removeprefix('/media/')) as thumbnail:
+            self.assertEqual((thumbnail.format, thumbnail.size), ('WEBP', (48, 48)))
+
+    @override_settings(AVATAR_MAX_DIMENSION=256)
+    def test_original_is_capped_and_stripped(self):
+        buffer = BytesIO()
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera maker'
+        Image.new('RGB', (800, 600), 'blue').save(buffer, 'JPEG', exif=exif)
+        self.upload(SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg'))
+        profile = UserProfile.objects.get(user=self.user)
+        with Image.open(profile.avatar.path) as original:
+            self.assertEqual(original.size, (256, 192))
+            self.assertEqual(len(original.getexif()), 0)
+
+    @override_settings(AVATAR_MAX_UPLOAD_BYTES=1024)
+    def test_oversized_and_invalid_uploads_are_rejected(self):
+        response = self.upload(image_upload(mode='RGB', image_format='BMP', name='big.bmp'))
+        self.assertIn('Avatar must be under 1.0', response.context['form'].errors['avatar'][0])
+        response = self.upload(SimpleUploadedFile('fake.png', b'not an image', content_type='image/png'))
+        self.assertTrue(response.context['form'].errors['avatar'])
+        self.assertFalse(UserProfile.objects.get(user=self.user).avatar)
+
+    def test_admin_table_and_file_headers(self):
+        self.upload(image_upload())
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertContains(self.client.get(reverse('dashboard')), profile.avatar_url(48, 'webp'))
+        response = self.client.get(profile.avatar_url(48, 'webp'))
+        self.assertEqual(response['Cache-Control'], f'public, max-age={settings.AVATAR_CACHE_SECONDS}, immutable')
+
+    def test_command_backfills_unprocessed_avatars(self):
+        profile = UserProfile.objects.get(user=self.user)
+        profile.avatar.save('legacy.png', image_upload())
+        out = StringIO()
+        call_command('process_avatars', stdout=out)
+        self.assertIn('1 of 1 avatar(s) processed.', out.getvalue())
+        profile.refresh_from_db()
+        self.assertTrue(profile.avatar_hash)
+        self.assertFalse((self.media / 'avatars' / 'legacy.png').exists())
+
+
+class JobTests(DashboardTestCase):
+    def run_jobs(self):
+        out = StringIO()
+        call_command('run_jobs', '--burst', stdout=out)
+        return out.getvalue()
+
+    def test_enqueued_in_a_rolled_back_transaction_never_runs(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            enqueue('rebuild_task_counters')
+            raise RuntimeError
+        self.assertFalse(Job.objects.exists())
+
+    def test_keyed_jobs_are_queued_once(self):
+        enqueue('rebuild_task_counters', key='all')
+        enqueue('rebuild_task_counters', key='all')
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertIn('Ran 1 job(s), 0 failed.', self.run_jobs())
+        self.assertEqual(Job.objects.get().status, 'done')
+
+    @override_settings(JOBS_MAX_ATTEMPTS=2, JOBS_RETRY_DELAY=0)
+    def test_failures_are_retried_then_marked_failed(self):
+        handler = mock.Mock(side_effect=ValueError('boom'))
+        with mock.patch.dict(JOBS, {'flaky': handler}):
+            job = enqueue('flaky', value=1)
+            with self.assertLogs('myapp.jobs', 'WARNING'):
+                self.run_jobs()
+        handler.assert_called_with(value=1)
+        self.assertEqual(handler.call_count, 2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIn('ValueError: boom', job.last_error)
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = enqueue('rebuild_task_counters')
+        Job.objects.filter(pk=job.pk).update(status='running', locked_at=now() - timedelta(hours=1))
+        self.run_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('done', 1))
+
+    def test_a_run_that_lost_its_claim_leaves_the_status_alone(self):
+        def outlive_the_lock(**payload):
+            # The lock timed out mid-run and another worker requeued and claimed the job
+            requeue_stale_jobs()
+            claim_jobs('other-worker', 1)
+
+        with mock.patch.dict(JOBS, {'slow': outlive_the_lock}), \
+                override_settings(JOBS_LOCK_TIMEOUT=0), self.assertLogs('myapp.jobs', 'WARNING'):
+            job = enqueue('slow')
+            [claimed] = claim_jobs('first-worker', 1)
+            run_job(claimed)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.attempts), ('running', 'other-worker', 2))
+
+    @override_settings(JOBS_DELETE_BATCH_SIZE=2)
+    def test_delete_user_deactivates_then_deletes_in_batches(self):
+        User.objects.filter(pk=self.user.pk).update(is_superuser=True)
+        bob = User.objects.create_user('bob', 'bob@example.com', 'pass12345')
+        for i in range(5):
+            Task.objects.create(user=bob, title=f'bob task {i}', is_completed=i < 3)
+        TaskArchive.archive(Task.objects.filter(user=bob, is_completed=True).values_list('id', flat=True))
+        self.client.post(reverse('delete_user', args=[bob.id]))
+        self.assertFalse(User.objects.get(pk=bob.pk).is_active)
+        self.assertEqual(TaskEvent.objects.filter(user_id=bob.pk).count(), 5)
+        with CaptureQueriesContext(connection) as queries:
+            self.run_jobs()
+        self.assertFalse(User.objects.filter(pk=bob.pk).exists())
+        self.assertFalse(Task.objects.filter(user_id=bob.pk).exists())
+        self.assertFalse(TaskArchive.objects.filter(user_id=bob.pk).exists())
+        self.assertFalse(TaskEvent.objects.filter(user_id=bob.pk).exists())
+        # The purge records no 'deleted' events of its own
+        self.assertFalse(any(query['sql'].startswith('INSERT INTO "myapp_taskevent"') for query in queries.captured_queries))
+        batches = [
+            sum(query['sql'].startswith(f'DELETE FROM "{table}" WHERE "{table}"."id" IN') for query in queries.captured_queries)
+            for table in ('myapp_task', 'myapp_taskarchive', 'myapp_taskevent')
+        ]
+        self.assertEqual(batches, [1, 2, 3])
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode_runs_on_commit(self):
+        handler = mock.Mock()
+        with mock.patch.dict(JOBS, {'noop': handler}):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertIsNone(enqueue('noop', value=1))
+        handler.assert_called_once_with(value=1)
+        self.assertFalse(Job.objects.exists())
+
+
+class LoginTests(DashboardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.logout()
+
+    def log_in(self, username='alice'):
+        return self.client.post(reverse('login'), {'username': username, 'password': 'pass12345'})
+
+    def test_login_stamps_the_profile_in_one_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.log_in()
+        profile_queries = [query['sql'] for query in queries.captured_queries if 'myapp_userprofile' in query['sql']]
+        self.assertEqual(len(profile_queries), 1)
+        self.assertTrue(profile_queries[0].startswith('UPDATE'))
+        self.assertIsNotNone(UserProfile.objects.get(user=self.user).last_login)
+
+    def test_superusers_become_admins_and_missing_profiles_are_created(self):
+        root = User.objects.create_superuser('root', 'root@example.com', 'pass12345')
+        UserProfile.objects.filter(user=root).update(role='user')
+        self.log_in('root')
+        self.assertEqual(UserProfile.objects.get(user=root).role, 'admin')
+        UserProfile.objects.filter(user=self.user).delete()
+        self.log_in()
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.name, profile.email, profile.role), ('alice', 'alice@example.com', 'user'))
+
+    def test_profile_save_writes_the_user_only_for_a_new_email(self):
+        profile = UserProfile.objects.get(user=self.user)
+        profile.name = 'Alice'
+        with CaptureQueriesContext(connection) as queries:
+            profile.save()
+        self.assertFalse(any('auth_user' in query['sql'] for query in queries.captured_queries))
+        profile.email = 'alice@tasksync.test'
+        profile.save()
+        self.assertEqual(User.objects.get(pk=self.user.pk).email, 'alice@tasksync.test')
+
+    @override_settings(
+        PASSWORD_HASHERS=['myapp.hashers.Argon2PasswordHasher', 'myapp.hashers.PBKDF2PasswordHasher'],
+        PASSWORD_ARGON2_TIME_COST=1, PASSWORD_ARGON2_MEMORY_COST=8192, PASSWORD_ARGON2_PARALLELISM=1,
+    )
+    def test_login_upgrades_hashes_to_the_preferred_hasher(self):
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+        self.log_in()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('argon2$argon2id$v=19$m=8192,t=1,p=1$'))
+        self.client.logout()
+        self.assertEqual(self.log_in().status_code, 302)
+        self.assertEqual(int(self.client.session['_auth_user_id']), self.user.pk)
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000,
+                       PASSWORD_HASHERS=['myapp.hashers.PBKDF2PasswordHasher'])
+    def test_pbkdf2_iterations_follow_settings(self):
+        self.assertTrue(make_password('secret').startswith('pbkdf2_sha256$1000$'))
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class SessionTests(DashboardTestCase):
+    def test_session_engine_defaults_follow_cache_backend(self):
+        clean = {name: value for name, value in os.environ.items() if name not in ('CACHE_BACKEND', 'SESSION_ENGINE')}
+        for backend, engine in (('locmem', 'db'), ('file', 'cached_db'), ('redis', 'cached_db')):
+            with mock.patch.dict(os.environ, {**clean, 'CACHE_BACKEND': backend}, clear=True):
+                config = runpy.run_path(str(settings.BASE_DIR / 'djangs' / 'settings.py'))
+            self.assertEqual(config['SESSION_ENGINE'], f'django.contrib.sessions.backends.{engine}')
+
+    def test_cached_sessions_skip_the_session_table(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('dashboard'))
+        self.assertFalse([q for q in queries.captured_queries if 'django_session' in q['sql']])
+
+    def test_purge_sessions_removes_only_expired(self):
+        Session.objects.create(session_key='stale', session_data='', expire_date=now() - timedelta(days=1))
+        call_command('purge_sessions', '--batch-size', '1', stdout=StringIO())
+        self.assertFalse(Session.objects.filter(session_key='stale').exists())
+        self.assertTrue(Session.objects.filter(expire_date__gte=now()).exists())
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class QueryBudgetTests(TestCase):
+    """
+    Per-view query ceilings, checked against enough rows that an N+1 would blow them.
+    Measured with cached_db sessions, as deployed with a shared cache; plain db
+    sessions add one session read per authenticated request.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('root', 'root@example.com', 'pass12345')
+        UserProfile.objects.filter(user=cls.admin).update(role='admin')
+        for i in range(20):
+            user = User.objects.create_user(f'user{i}', f'user{i}@example.com', 'pass12345')
+            for j in range(3):
+                Task.objects.create(user=user, title=f'task {i}.{j}', is_completed=j == 0)
+        cls.task = Task.objects.filter(is_completed=False).first()
+        cls.member = cls.task.user
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+        # Warm the per-user presence throttle so budgets measure the views themselves
+        self.client.get(reverse('login'))
+
+    def test_dashboard(self):
+        with query_budget(7):
+            self.client.get(reverse('dashboard'))
+        with query_budget(7):
+            self.client.get(reverse('dashboard'), {'task_query': 'task', 'status': 'pending', 'user_query': 'user'})
+        # Warm fragments leave the user/profile lookups and the task page
+        with query_budget(3):
+            self.client.get(reverse('dashboard'))
+
+    def test_dashboard_for_regular_user(self):
+        self.client.force_login(self.member)
+        self.client.get(reverse('login'))
+        with query_budget(6):
+            self.client.get(reverse('dashboard'))
+
+    def test_add_task(self):
+        with query_budget(7):
+            self.client.post(reverse('dashboard'), {'add_task': '1', 'title': 'new task'})
+
+    def test_task_mutations(self):
+        with query_budget(3):
+            self.client.get(reverse('edit_task', args=[self.task.id]))
+        with query_budget(8):
+            self.client.post(reverse('edit_task', args=[self.task.id]), {'title': 'renamed'})
+        with query_budget(8):
+            self.client.get(reverse('complete_task', args=[self.task.id]))
+        with query_budget(9):
+            self.client.post(reverse('delete_task', args=[self.task.id]))
+
+    def test_profile_admin_views(self):
+        with query_budget(3):
+            self.client.get(reverse('edit_profile', args=[self.member.id]))
+        with query_budget(3):
+            self.client.get(reverse('delete_user', args=[self.member.id]))
+        with query_budget(7):
+            self.client.post(reverse('edit_profile', args=[self.member.id]), {
+                'name': 'Member', 'email': 'member@example.com', 'role': 'user',
+            })
+        with query_budget(6):
+            self.client.post(reverse('delete_user', args=[self.member.id]))
+
+    def test_auth_views(self):
+        self.client.logout()
+        with query_budget(0):
+            self.client.get(reverse('login'))
+        with query_budget(0):
+            self.client.get(reverse('register'))
+        with query_budget(13):
+            self.client.post(reverse('register'), {
+                'username': 'newbie', 'email': 'newbie@example.com',
+                'password1': 'S3cure-pass-99', 'password2': 'S3cure-pass-99',
+            })
+        self.client.logout()
+        with query_budget(10):
+            self.client.post(reverse('login'), {'username': 'root', 'password': 'pass12345'})
+        # Logging in resets the presence throttle, so logout also pays for one presence write
+        with query_budget(9):
+            self.client.get(reverse('logout'))
+
+
+    def test_dashboard_with_archive(self):
+        TaskArchive.archive(Task.objects.filter(is_completed=True).values_list('id', flat=True)[:10])
+        with query_budget(8):
+            self.client.get(reverse('dashboard'), {'archived': '1'})
+        with query_budget(6):
+            self.client.get(reverse('dashboard'), {'archived': '1', 'status': 'completed', 'task_query': 'task'})
+
+    def test_bulk_tasks(self):
+        ids = list(Task.objects.filter(user=self.member).values_list('id', flat=True))
+
+        def bulk(action, payload):
+            return self.client.post(reverse('bulk_tasks', args=[action]), json.dumps(payload),
+                                    content_type='application/json')
+        with query_budget(8):
+            bulk('complete', {'ids': ids})
+        with query_budget(8):
+            bulk('edit', {'ids': ids, 'changes': {'description': 'batched', 'is_completed': False}})
+        with query_budget(9):
+            bulk('delete', {'filter': {'status': 'pending', 'task_query': 'task 3.'}})
+
+    def test_task_export_import(self):
+        with query_budget(3):
+            exported = b''.join(self.client.get(reverse('task_export'), {'format': 'csv'}).streaming_content)
+        # One counter UPDATE per task owner in the file: 20 users here
+        with query_budget(27):
+            self.client.post(reverse('task_import'), {
+                'file': SimpleUploadedFile('tasks.csv', exported, content_type='text/csv'),
+            })
+
+    def test_api(self):
+        with query_budget(4):
+            response = self.client.get(reverse('api_task_list'))
+        with query_budget(2):
+            self.client.get(reverse('api_task_list'), HTTP_IF_NONE_MATCH=response['ETag'])
+        with query_budget(5):
+            self.client.get(reverse('api_task_list'), {'archived': '1', 'status': 'completed'})
+        with query_budget(4):
+            self.client.get(reverse('api_task_detail', args=[self.task.id]))
+        with query_budget(9):
+            self.client.patch(reverse('api_task_detail', args=[self.task.id]),
+                              json.dumps({'is_completed': True}), content_type='application/json')
+        with query_budget(8):
+            response = self.client.post(reverse('api_task_list'), json.dumps({'title': 'from the api'}),
+                                        content_type='application/json')
+        with query_budget(9):
+            self.client.delete(reverse('api_task_detail', args=[response.json()['id']]))
+
+    @override_settings(LIVE_EVENTS=True)
+    def test_task_events_stream(self):
+        # Only the opening stats; the stream then waits on the broker
+        with query_budget(3):
+            response = self.client.get(reverse('task_events'))
+            next(iter(response.streaming_content))
+        response.close()
+
+class ExplainDashboardTests(DashboardTestCase):
+    def test_prints_a_plan_per_dashboard_query(self):
+        out = StringIO()
+        call_command('explain_dashboard', 'alice', stdout=out)
+        self.assertIn('task_user_created_idx', out.getvalue())
+        self.assertIn('users online', out.getvalue())
+
+
+class BulkTaskTests(DashboardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tasks = [Task.objects.create(user=self.user, title=f'task {i}') for i in range(3)]
+        self.bob = User.objects.create_user('bob', 'bob@example.com', 'pass12345')
+        self.bobs_task = Task.objects.create(user=self.bob, title='not yours')
+
+    def bulk(self, action, payload):
+        return self.client.post(
+            reverse('bulk_tasks', args=[action]), json.dumps(payload), content_type='application/json'
+        ).json()
+
+    def test_complete_reports_per_id_outcomes(self):
+        self.tasks[0].is_completed = True
+        self.tasks[0].save()
+        ids = [task.id for task in self.tasks] + [self.bobs_task.id]
+        # Warm the presence throttle so the budget doesn't depend on which tests ran first
+        cache.clear()
+        self.client.get(reverse('login'))
+        with query_budget(9):
+            response = self.bulk('complete', {'ids': ids})
+        self.assertEqual(response['results'], {
+            str(self.tasks[0].id): 'already_completed',
+            str(self.tasks[1].id): 'completed',
+            str(self.tasks[2].id): 'completed',
+            str(self.bobs_task.id): 'not_found',
+        })
+        self.assertFalse(Task.objects.get(pk=self.bobs_task.pk).is_completed)
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.completed_task_count, profile.pending_task_count), (3, 0))
+
+    def test_delete_by_filter(self):
+        Task.objects.filter(pk=self.tasks[0].pk).update(is_completed=True)
+        call_command('rebuild_task_counters', stdout=StringIO())
+        response = self.bulk('delete', {'filter': {'status': 'pending'}})
+        self.assertEqual(sorted(response['results']), sorted(str(t.id) for t in self.tasks[1:]))
+        self.assertEqual(list(Task.objects.filter(user=self.user)), [self.tasks[0]])
+        self.assertEqual(UserProfile.objects.get(user=self.user).task_count, 1)
+
+    def test_edit_validates_changes(self):
+        ids = [task.id for task in self.tasks]
+        response = self.bulk('edit', {'ids': ids, 'changes': {'title': ''}})
+        self.assertIn('title', response['fields'])
+        self.bulk('edit', {'ids': ids, 'changes': {'description': 'batched', 'is_completed': True}})
+        self.assertEqual(Task.objects.filter(description='batched', is_completed=True).count(), 3)
+        self.assertEqual(UserProfile.objects.get(user=self.user).completed_task_count, 3)
+
+    def test_rejects_malformed_changes_and_filter(self):
+        ids = [task.id for task in self.tasks]
+        for payload in ({'ids': ids, 'changes': ['title']}, {'ids': ids, 'changes': 'done'},
+                        {'filter': ['pending']}):
+            response = self.client.post(reverse('bulk_tasks', args=['edit']), json.dumps(payload),
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('must be an object', response.json()['error'])
+
+    def test_requires_ids_or_filter(self):
+        response = self.client.post(reverse('bulk_tasks', args=['delete']))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.count(), 4)
+
+    @override_settings(BULK_TASKS_MAX=2)
+    def test_filter_reports_more(self):
+        response = self.bulk('complete', {'filter': {}})
+        self.assertTrue(response['more'])
+        self.assertEqual(len(response['results']), 2)
+
+
+class TaskTransferTests(DashboardTestCase):
+    def setUp(self):
+        super().setUp()
+        UserProfile.objects.filter(user=self.user).update(role='admin')
+        Task.objects.create(user=self.user, title='Ship, "quoted"', description='line one\nline two')
+        Task.objects.create(user=self.user, title='done', is_completed=True)
+
+    def test_csv_round_trip(self):
+        Task.objects.filter(title='done').update(created_at=now() - timedelta(days=3))
+        created = dict(Task.objects.values_list('title', 'created_at'))
+        response = self.client.get(reverse('task_export'), {'format': 'csv'})
+        exported = b''.join(response.streaming_content)
+        Task.objects.all().delete()
+
+        upload = SimpleUploadedFile('tasks.csv', exported, content_type='text/csv')
+        self.client.post(reverse('task_import'), {'file': upload})
+        self.assertEqual(
+            sorted(Task.objects.values_list('title', 'description', 'is_completed')),
+            [('Ship, "quoted"', 'line one\nline two', False), ('done', '', True)],
+        )
+        # Tasks keep their place in the (created_at, id) order
+        self.assertEqual(dict(Task.objects.values_list('title', 'created_at')), created)
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.task_count, profile.completed_task_count), (2, 1))
+
+    def test_unreadable_created_at_falls_back_to_now(self):
+        upload = SimpleUploadedFile('tasks.csv', b'title,created_at\nundated,yesterday\n', content_type='text/csv')
+        self.client.post(reverse('task_import'), {'file': upload})
+        self.assertLess(now() - Task.objects.get(title='undated').created_at, timedelta(minutes=1))
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('task_export'), {'format': 'jsonl'})
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual([json.loads(line)['title'] for line in content.splitlines()], ['Ship, "quoted"', 'done'])
+
+    def test_csv_with_byte_order_mark(self):
+        upload = SimpleUploadedFile('tasks.csv', '\ufefftitle,is_completed\nFrom Excel,yes\n'.encode(), content_type='text/csv')
+        self.client.post(reverse('task_import'), {'file': upload})
+        self.assertTrue(Task.objects.filter(title='From Excel', is_completed=True, user=self.user).exists())
+
+    def test_non_utf8_upload_imports_nothing(self):
+        content = 'title\nfirst\n' + 'x\n' * 10 + 'caf\xe9\n'
+        upload = SimpleUploadedFile('tasks.csv', content.encode('latin-1'), content_type='text/csv')
+        response = self.client.post(reverse('task_import'), {'file': upload}, follow=True)
+        self.assertContains(response, "isn&#x27;t UTF-8 text")
+        self.assertFalse(Task.objects.filter(title='first').exists())
+
+    def test_jsonl_import_validates_rows(self):
+        path = Path(self.enterContext(tempfile.TemporaryDirectory())) / 'tasks.jsonl'
+        path.write_text(
+            '{"title": "ok", "username": "alice"}\n'
+            '{"title": ""}\n'
+            '{"title": "ghost", "username": "nobody"}\n'
+            'not json\n'
+        )
+        err = StringIO()
+        call_command('import_tasks', str(path), '--chunk-size', '2', stdout=StringIO(), stderr=err)
+        self.assertTrue(Task.objects.filter(title='ok').exists())
+        self.assertEqual(err.getvalue().count('line '), 3)
+
+    def test_export_command_streams_jsonl(self):
+        out = StringIO()
+        call_command('export_tasks', '--format', 'jsonl', stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row['username'] for row in rows], ['alice', 'alice'])
+
+    def test_non_admins_cannot_export(self):
+        UserProfile.objects.filter(user=self.user).update(role='user')
+        response = self.client.get(reverse('task_export'))
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+
+
+class ProvisionUsersTests(DashboardTestCase):
+    def provision(self, text, *args):
+        path = Path(self.enterContext(tempfile.TemporaryDirectory())) / 'users.csv'
+        if isinstance(text, bytes):
+            path.write_bytes(text)
+        else:
+            path.write_text(text)
+        err = StringIO()
+        call_command('provision_users', str(path), *args, stdout=StringIO(), stderr=err)
+        return err.getvalue()
+
+    def test_creates_users_and_profiles_in_bulk(self):
+        rows = ''.join(f'user{i},user{i}@example.com,S3cure-pass-{i:02d},User {i},user\n' for i in range(6))
+        with CaptureQueriesContext(connection) as queries:
+            errors = self.provision('username,email,password,name,role\n' + rows, '--chunk-size', '3', '--workers', '2')
+        self.assertEqual(errors, '')
+        # Per chunk: the duplicate check, the user and profile inserts, and the transaction
+        self.assertLessEqual(len(queries), 2 * 5)
+        user = User.objects.get(username='user4')
+        self.assertTrue(user.check_password('S3cure-pass-04'))
+        self.assertEqual(UserProfile.objects.filter(user__username__startswith='user').count(), 6)
+        self.assertEqual(user.userprofile.name, 'User 4')
+
+    def test_rejects_duplicates_and_invalid_rows(self):
+        errors = self.provision(
+            'username,email,role\n'
+            'alice,new@example.com,user\n'
+            'bob,alice@example.com,user\n'
+            'carol,carol@example.com,user\n'
+            'carol2,carol@example.com,user\n'
+            'dave,not-an-email,user\n'
+            'erin,erin@example.com,owner\n'
+        )
+        self.assertEqual(errors.count('line '), 5)
+        self.assertIn("email 'carol@example.com' is already in use", errors)
+        carol = User.objects.get(username='carol')
+        self.assertFalse(carol.has_usable_password())
+        self.assertEqual(carol.userprofile.role, 'user')
+
+    def test_csv_with_byte_order_mark(self):
+        errors = self.provision('\ufeffusername,email\nfrank,frank@example.com\n'.encode())
+        self.assertEqual(errors, '')
+        self.assertTrue(User.objects.filter(username='frank').exists())
+
+    def test_non_utf8_file_creates_nobody(self):
+        content = 'username,email\nfrank,frank@example.com\n' + 'x\n' * 10 + 'jos\xe9,jose@example.com\n'
+        with self.assertRaisesMessage(CommandError, 'is not UTF-8 text'):
+            self.provision(content.encode('latin-1'), '--chunk-size', '1', '--workers', '1')
+        self.assertFalse(User.objects.filter(username='frank').exists())
+
+    def test_register_creates_one_profile(self):
+        self.client.logout()
+        self.client.post(reverse('register'), {
+            'username': 'newbie', 'email': 'newbie@example.com',
+            'password1': 'S3cure-pass-99', 'password2': 'S3cure-pass-99',
+        })
+        self.assertEqual(UserProfile.objects.filter(user__username='newbie').count(), 1)
+
+
+class TaskApiTests(DashboardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.task = Task.objects.create(user=self.user, title='api task')
+        self.bob = User.objects.create_user('bob', 'bob@example.com', 'pass12345')
+        self.bobs_task = Task.objects.create(user=self.bob, title='not yours')
+
+    def test_list_only_shows_own_tasks(self):
+        response = self.client.get(reverse('api_task_list'))
+        self.assertEqual([task['id'] for task in response.json()['results']], [self.task.id])
+        self.assertEqual(self.client.get(reverse('api_task_detail', args=[self.bobs_task.id])).status_code, 404)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_conditional_get_until_tasks_change(self):
+        response = self.client.get(reverse('api_task_list'))
+        etag = response['ETag']
+        with query_budget(2):
+            response = self.client.get(reverse('api_task_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Other users' changes don't invalidate this user's list
+        Task.objects.create(user=self.bob, title='elsewhere')
+        self.assertEqual(self.client.get(reverse('api_task_list'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.patch(reverse('api_task_detail', args=[self.task.id]),
+                          json.dumps({'is_completed': True}), content_type='application/json')
+        response = self.client.get(reverse('api_task_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['results'][0]['is_completed'])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_admin_conditional_get_follows_the_global_version(self):
+        UserProfile.objects.filter(user=self.user).update(role='admin')
+        etag = self.client.get(reverse('api_task_list'))['ETag']
+        # The profile and the cached version token; nothing that scans every profile
+        with query_budget(2):
+            response = self.client.get(reverse('api_task_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Task.objects.create(user=self.bob, title='elsewhere')
+        response = self.client.get(reverse('api_task_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+
+    def test_create_update_delete(self):
+        response = self.client.post(reverse('api_task_list'), json.dumps({'title': 'from api'}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        task_id = response.json()['id']
+
+        response = self.client.put(reverse('api_task_detail', args=[task_id]),
+                                   json.dumps({'title': ''}), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.delete(reverse('api_task_detail', args=[task_id]))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Task.objects.filter(pk=task_id).exists())
+
+    def test_patch_keeps_fields_it_leaves_out(self):
+        due = now().replace(microsecond=0) + timedelta(days=2)
+        Task.objects.filter(pk=self.task.pk).update(description='details', due_date=due)
+        response = self.client.patch(reverse('api_task_detail', args=[self.task.id]),
+                                     json.dumps({'is_completed': True}), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        task = Task.objects.get(pk=self.task.pk)
+        self.assertEqual((task.title, task.description, task.due_date, task.is_completed),
+                         ('api task', 'details', due, True))
+
+    def test_form_encoded_put_and_patch(self):
+        url = reverse('api_task_detail', args=[self.task.id])
+        response = self.client.patch(url, 'title=renamed&is_completed=yes', content_type='application/x-www-form-urlencoded')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['title'], 'renamed')
+        self.assertTrue(response.json()['is_completed'])
+
+        response = self.client.put(url, 'title=', content_type='application/x-www-form-urlencoded')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.put(url, b'title: ignored', content_type='text/plain')
+        self.assertEqual(response.status_code, 415)
+        self.assertEqual(Task.objects.get(pk=self.task.pk).title, 'renamed')
+
+    def test_stale_if_match_is_rejected(self):
+        etag = self.client.get(reverse('api_task_detail', args=[self.task.id]))['ETag']
+        Task.objects.create(user=self.user, title='concurrent change')
+        response = self.client.delete(reverse('api_task_detail', args=[self.task.id]), HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+
+    def test_anonymous_gets_401(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api_task_list')).status_code, 401)
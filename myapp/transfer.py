@@ -0,0 +1,173 @@
+import codecs
+import csv
+import json
+
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .forms import TaskForm
+from .fragments import invalidate_dashboard
+from .live import publish_refresh
+from .models import Task, TaskEvent, UserProfile, batch_task_changes
+
+FORMATS = ('csv', 'jsonl')
+EXPORT_FIELDS = ['id', 'username', 'title', 'description', 'is_completed', 'created_at', 'due_date']
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+
+
+class Echo:
+    """File-like object whose write() hands the line back, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def guess_format(filename, default='csv'):
+    for fmt in FORMATS:
+        if filename.lower().endswith(f'.{fmt}'):
+            return fmt
+    return default
+
+
+def export_rows(queryset):
+    # named=True: plain values_list runs its query as soon as it is iterated, which
+    # aiterator() does on the event loop; the named form defers it like the others
+    return queryset.order_by('id').values_list(
+        'id', 'user__username', 'title', 'description', 'is_completed', 'created_at', 'due_date', named=True
+    )
+
+
+def format_row(writer, row, fmt):
+    if fmt == 'jsonl':
+        return json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + '\n'
+    task_id, username, title, description, is_completed, created_at, due_date = row
+    return writer.writerow([
+        task_id, username, title, description, is_completed, created_at.isoformat(),
+        due_date.isoformat() if due_date else '',
+    ])
+
+
+def export_tasks(queryset, fmt='csv', chunk_size=2000):
+    """Yield ``queryset`` as CSV or JSONL lines, reading it ``chunk_size`` rows at a time."""
+    writer = csv.writer(Echo())
+    if fmt == 'csv':
+        yield writer.writerow(EXPORT_FIELDS)
+    for row in export_rows(queryset).iterator(chunk_size=chunk_size):
+        yield format_row(writer, row, fmt)
+
+
+async def aexport_tasks(queryset, fmt='csv', chunk_size=2000):
+    """export_tasks as an async iterator, for streaming under ASGI."""
+    writer = csv.writer(Echo())
+    if fmt == 'csv':
+        yield writer.writerow(EXPORT_FIELDS)
+    async for row in export_rows(queryset).aiterator(chunk_size=chunk_size):
+        yield format_row(writer, row, fmt)
+
+
+def check_utf8(chunks):
+    """
+    Raise UnicodeDecodeError unless the byte ``chunks`` decode as UTF-8, so a
+    bad byte late in a file is caught before any chunk has been imported.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for chunk in chunks:
+        decoder.decode(chunk)
+    decoder.decode(b'', final=True)
+
+
+def read_records(lines, fmt='csv'):
+    """Yield ``(line_number, record)`` pairs from an iterable of text lines."""
+    if fmt == 'jsonl':
+        for number, line in enumerate(lines, start=1):
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                yield number, record
+        return
+
+    reader = csv.DictReader(lines)
+    for record in reader:
+        yield reader.line_num, record
+
+
+def parse_created_at(value):
+    """An exported ``created_at``, or None if it is missing or unreadable."""
+    try:
+        created_at = parse_datetime(str(value or '').strip())
+    except ValueError:
+        return None
+    if created_at is not None and timezone.is_naive(created_at):
+        created_at = timezone.make_aware(created_at)
+    return created_at
+
+
+def build_task(record, users, default_user=None):
+    """Validate one record with TaskForm's rules; return ``(task, errors)``."""
+    if not isinstance(record, dict):
+        return None, ["not a valid record"]
+    form = TaskForm(data={
+        'title': record.get('title') or '',
+        'description': record.get('description') or '',
+        'due_date': record.get('due_date') or '',
+    })
+    if not form.is_valid():
+        return None, [f"{field}: {' '.join(messages)}" for field, messages in form.errors.items()]
+
+    username = record.get('username')
+    user = users.get(username) if username else default_user
+    if user is None:
+        return None, [f"unknown user {username!r}" if username else "no username and no default user"]
+
+    task = form.save(commit=False)
+    task.user = user
+    task.is_completed = str(record.get('is_completed', '')).strip().lower() in TRUE_VALUES
+    # Keeping the exported time keeps a round trip in the same (created_at, id) page order
+    task.created_at = parse_created_at(record.get('created_at')) or task.created_at
+    return task, []
+
+
+def import_tasks(records, default_user=None, chunk_size=1000):
+    """
+    Validate and bulk-insert ``(line_number, record)`` pairs, ``chunk_size``
+    rows per INSERT and transaction. Tasks keep a valid ``created_at`` from the
+    record and otherwise get a fresh one.
+    Returns ``(created, errors)`` with errors as ``(line_number, messages)``.
+    """
+    created, errors, chunk = 0, [], []
+
+    def flush():
+        users = User.objects.in_bulk(
+            {record.get('username') for _, record in chunk if isinstance(record, dict) and record.get('username')},
+            field_name='username',
+        )
+        tasks = []
+        for number, record in chunk:
+            task, problems = build_task(record, users, default_user)
+            if problems:
+                errors.append((number, problems))
+            else:
+                tasks.append(task)
+        # bulk_create skips the Task signals, so account for the counters, activity log and cache here
+        with transaction.atomic(), batch_task_changes():
+            Task.objects.bulk_create(tasks)
+            for task in tasks:
+                UserProfile.record_task_change(task.user_id, total=1, completed=int(task.is_completed))
+                TaskEvent.record('created', task)
+            invalidate_dashboard(*{task.user_id for task in tasks})
+            publish_refresh({task.user_id for task in tasks})
+        chunk.clear()
+        return len(tasks)
+
+    for number, record in records:
+        chunk.append((number, record))
+        if len(chunk) >= chunk_size:
+            created += flush()
+    if chunk:
+        created += flush()
+    return created, errors
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('login/', views.user_login, name='login'),
@@ -8,6 +8,14 @@ urlpatterns = [
     path('task/<int:task_id>/complete/', views.complete_task, name='complete_task'),
     path('task/<int:task_id>/delete/', views.delete_task, name='delete_task'),
     path('task/<int:task_id>/edit/', views.edit_task, name='edit_task'),
+    path('tasks/events/', views.task_events, name='task_events'),
+    path('tasks/bulk/<slug:action>/', views.bulk_tasks, name='bulk_tasks'),
+    path('tasks/export/', views.task_export, name='task_export'),
+    path('tasks/import/', views.task_import, name='task_import'),
+    path('api/tasks/', api.task_list, name='api_task_list'),
+    path('api/tasks/<int:task_id>/', api.task_detail, name='api_task_detail'),
+    path('metrics/', views.request_metrics, name='request_metrics'),
+    path('media/avatars/<path:path>', views.avatar_file, name='avatar_file'),
     path('register/', views.register_user, name='register'),  # Changed to 'register'
     path('profile/<int:user_id>/edit/', views.edit_profile, name='edit_profile'),
     path('user/<int:user_id>/delete/', views.delete_user, name='delete_user'),
@@ -1,15 +1,36 @@
+import asyncio
+import io
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.models import User
-from django.contrib.sessions.models import Session
+from django.shortcuts import render, aget_object_or_404, get_object_or_404, redirect
+from django.template.loader import render_to_string
+from django.http import Http404, HttpResponse, JsonResponse
 from django.utils.timezone import now
 from django.views.decorators.http import require_POST
+from django.views.static import serve
 from django.contrib import messages
-from django.db.models import Q
+from django.db.models import Count, Q, Sum
+from django.conf import settings
 
-from .models import UserProfile, Task
-from .forms import UserProfileForm, RegisterForm, TaskForm
+from .models import DUE_FILTERS, UserProfile, Task, TaskArchive, TaskEvent
+from .avatars import schedule_avatar_processing
+from .jobs import enqueue
+from .live import channel_for, event_stream
+from .forms import UserProfileForm, RegisterForm, TaskForm, BulkTaskEditForm
+from .bulk import BULK_ACTIONS, run_bulk_action
+from .fragments import GLOBAL_SCOPE, aread_fragments, awrite_fragments, dashboard_fragment_keys, invalidate_dashboard
+from .pagination import apaginate_tasks, get_page_size, stream_task_list
+from .search import IcontainsSearchBackend, get_search_backend
+from .streaming import streaming_response
+from .metrics import request_metric_names, store as metrics_store
+from .presence import aonline_user_count
+from .transfer import FORMATS, aexport_tasks, check_utf8, export_tasks, guess_format, import_tasks, read_records
 
 # User Login View
 def user_login(request):
@@ -19,20 +40,15 @@ def user_login(request):
         user = authenticate(request, username=username, password=password)
         if user:
             login(request, user)
-            # Create or update UserProfile
-            profile, created = UserProfile.objects.get_or_create(
-                user=user,
-                defaults={
-                    'name': user.username,
-                    'email': user.email,
-                    'role': 'admin' if user.is_superuser else 'user'
-                }
-            )
-            if not created and user.is_superuser:
-                profile.role = 'admin'  # Ensure superusers have admin role
-                profile.save()
-            profile.last_login = now()
-            profile.save()
+            # Stamp the profile (and make sure superusers are admins) in one UPDATE;
+            # only users that predate profiles need one created
+            changes = {'last_login': now()}
+            if user.is_superuser:
+                changes['role'] = 'admin'
+            if not UserProfile.objects.filter(user=user).update(**changes):
+                UserProfile.objects.create(user=user, name=user.username, email=user.email, **changes)
+            # update() skips the post_save signal that refreshes the admin user table
+            invalidate_dashboard(user.pk)
             messages.success(request, "✅ Logged in successfully!")
             return redirect('dashboard')
         else:
@@ -45,147 +61,343 @@ def user_logout(request):
     messages.success(request, "✅ Logged out successfully!")
     return redirect('login')
 
-# Dashboard View
-@login_required
-def dashboard(request):
-    try:
-        user_profile = request.user.userprofile
-    except UserProfile.DoesNotExist:
-        messages.error(request, "User profile not found.")
-        return redirect('login')
+def due_range(status):
+    """due_date lookups for the overdue and due-soon filters."""
+    current = now()
+    if status == 'overdue':
+        return {'due_date__lt': current}
+    return {'due_date__gte': current, 'due_date__lt': current + timedelta(hours=settings.TASK_DUE_SOON_HOURS)}
 
-    user_query = request.GET.get('user_query', '')
-    task_query = request.GET.get('task_query', '')
-    status = request.GET.get('status', 'all')
-
-    # Admin or superuser sees all users and tasks
-    if user_profile.role == "admin" or request.user.is_superuser:
-        users = UserProfile.objects.filter(name__icontains=user_query) if user_query else UserProfile.objects.all()
-        user_tasks = Task.objects.all()
-    else:
-        users = UserProfile.objects.filter(user=request.user)
-        user_tasks = Task.objects.filter(user=request.user)
+def filter_tasks(user, is_admin, task_query='', status='all'):
+    """The dashboard task list for ``user``, newest first."""
+    user_tasks = Task.objects.all() if is_admin else Task.objects.filter(user=user)
 
     # Filter tasks by search
     if task_query:
-        user_tasks = user_tasks.filter(
-            Q(title__icontains=task_query) | Q(description__icontains=task_query)
-        )
+        user_tasks = get_search_backend(user_tasks.db).search(user_tasks, task_query)
 
     # Filter tasks by status
     if status == 'completed':
         user_tasks = user_tasks.filter(is_completed=True)
     elif status == 'pending':
         user_tasks = user_tasks.filter(is_completed=False)
+    elif status in DUE_FILTERS:
+        user_tasks = user_tasks.filter(is_completed=False, **due_range(status))
+
+    return user_tasks.order_by('-created_at', '-id')
+
+def filter_archived_tasks(user, is_admin, task_query='', status='all'):
+    """Archived tasks matching the dashboard filters, or None when the status filter rules them out."""
+    if status not in ('all', 'completed'):
+        return None
+    archived = TaskArchive.objects.all() if is_admin else TaskArchive.objects.filter(user=user)
+    if task_query:
+        # The full-text index covers only the hot table; the archive is searched on request only
+        archived = IcontainsSearchBackend().search(archived, task_query)
+    return archived.order_by('-created_at', '-id')
+
+async def task_stats(user_profile, is_admin, user_tasks, task_query, status, archived_tasks=None):
+    """
+    Return (completed, total) for the dashboard, from the profile counters when no
+    search or due filter is active. The counters include archived tasks.
+    """
+    if task_query or status in DUE_FILTERS:
+        counts = await user_tasks.aaggregate(
+            total=Count('id'), completed=Count('id', filter=Q(is_completed=True))
+        )
+        archived = await archived_tasks.acount() if archived_tasks is not None else 0
+        return counts['completed'] + archived, counts['total'] + archived
+
+    if is_admin:
+        counters = await UserProfile.objects.aaggregate(
+            total=Sum('task_count'), completed=Sum('completed_task_count')
+        )
+        tasks_total, tasks_completed = counters['total'] or 0, counters['completed'] or 0
+    else:
+        tasks_total, tasks_completed = user_profile.task_count, user_profile.completed_task_count
+
+    if status == 'completed':
+        return tasks_completed, tasks_completed
+    if status == 'pending':
+        return 0, tasks_total - tasks_completed
+    return tasks_completed, tasks_total
+
+def activity_events(user, is_admin):
+    # A range read of the (user, timestamp) index instead of re-deriving activity from tasks
+    events = TaskEvent.objects.select_related('user').order_by('-timestamp', '-id')
+    return events if is_admin else events.filter(user=user)
+
+async def recent_activity(user, is_admin):
+    return [{
+        'action': event.action,
+        'message': f"Task '{event.title}' {event.action} by {event.user.username}",
+        'timestamp': event.timestamp
+    } async for event in activity_events(user, is_admin)[:5]]
+
+async def user_table(user_query):
+    users = UserProfile.objects.select_related('user')
+    if user_query:
+        users = users.filter(name__icontains=user_query)
+    return render_to_string(
+        "myapp/user_table.html", {"users": [user async for user in users], "user_query": user_query}
+    )
 
-    user_tasks = user_tasks.order_by('-created_at')
-    tasks_completed = user_tasks.filter(is_completed=True).count()
-    tasks_pending = user_tasks.count() - tasks_completed
+def wants_json(request):
+    """Dashboard scripts send ``Accept: application/json`` and apply the change from the live feed."""
+    return request.get_preferred_type(['text/html', 'application/json']) == 'application/json'
 
-    # Handle task creation
+async def request_profile(request):
+    """
+    Load the profile for an async view and pin user and profile on the request,
+    so templates reading ``request.user.userprofile`` don't query from the event loop.
+    """
+    request.user = user = await request.auser()
+    user.userprofile = await UserProfile.objects.aget(user=user)
+    return user.userprofile
+
+# Dashboard View
+@login_required
+async def dashboard(request):
+    try:
+        user_profile = await request_profile(request)
+    except UserProfile.DoesNotExist:
+        messages.error(request, "User profile not found.")
+        return redirect('login')
+
+    user_query = request.GET.get('user_query', '')
+    task_query = request.GET.get('task_query', '')
+    status = request.GET.get('status', 'all')
+    cursor = request.GET.get('cursor', '')
+    archived = request.GET.get('archived') == '1'
+    stream = request.GET.get('stream') == '1' or settings.TASKS_STREAMING
+
+    # Handle task creation before loading anything the redirect would discard
     task_form = TaskForm()
     if request.method == "POST" and 'add_task' in request.POST:
         task_form = TaskForm(request.POST)
         if task_form.is_valid():
             new_task = task_form.save(commit=False)
             new_task.user = request.user
-            new_task.save()
+            await new_task.asave()
+            if wants_json(request):
+                return HttpResponse(status=204)
             messages.success(request, "✅ Task added successfully!")
             return redirect('dashboard')
+        elif wants_json(request):
+            return JsonResponse({"errors": task_form.errors}, status=400)
         else:
             messages.error(request, "❌ Invalid task data.")
 
-    # Active sessions / users online
-    active_sessions = Session.objects.filter(expire_date__gte=now())
-    online_user_ids = [s.get_decoded().get('_auth_user_id') for s in active_sessions]
-    users_online = User.objects.filter(id__in=online_user_ids).count()
+    # Admin or superuser sees all users and tasks
+    is_admin = user_profile.role == "admin" or request.user.is_superuser
+    # The search backend may check its index on first use, so build the queryset off the loop
+    user_tasks = await sync_to_async(filter_tasks)(request.user, is_admin, task_query, status)
+    # Completed tasks moved to the archive are only read when asked for
+    archived_tasks = filter_archived_tasks(request.user, is_admin, task_query, status) if archived else None
+
+    # Stats, recent activity and the admin user table come from one cache read;
+    # only the fragments missing or stale for the current version are rebuilt
+    scope = GLOBAL_SCOPE if is_admin else request.user.pk
+    fragment_keys = dashboard_fragment_keys(scope, task_query, status, user_query, archived)
+    version, fragments = await aread_fragments(scope, fragment_keys)
 
-    # Recent activity
-    recent_activities = [{
-        'action': 'completed' if task.is_completed else 'created',
-        'message': f"Task '{task.title}' {'completed' if task.is_completed else 'created'} by {task.user.username}",
-        'timestamp': task.created_at
-    } for task in user_tasks[:5]]
+    # The user table is cached as rendered HTML; it grows with the user count
+    builders = {
+        'stats': lambda: task_stats(user_profile, is_admin, user_tasks, task_query, status, archived_tasks),
+        'online': aonline_user_count,
+        'activity': lambda: recent_activity(request.user, is_admin),
+        'user_table': lambda: user_table(user_query),
+    }
+    stale_names = [name for name in fragment_keys if name not in fragments]
+    # The independent queries are issued together rather than one after another
+    stale = dict(zip(stale_names, await asyncio.gather(*(builders[name]() for name in stale_names))))
+    await awrite_fragments(version, fragment_keys, stale)
+    fragments.update(stale)
 
-    return render(request, "myapp/home.html", {
-        "users": users,
+    tasks_completed, tasks_total = fragments['stats']
+    context = {
+        "user_table": fragments.get('user_table', ''),
+        "is_admin": is_admin,
         "user_query": user_query,
         "task_query": task_query,
         "status": status,
-        "users_online": users_online,
-        "user_tasks": user_tasks,
+        "users_online": fragments['online'],
         "tasks_completed": tasks_completed,
-        "tasks_pending": tasks_pending,
+        "tasks_pending": tasks_total - tasks_completed,
+        "tasks_total": tasks_total,
         "task_form": task_form,
-        "recent_activities": recent_activities,
-    })
+        "recent_activities": fragments['activity'],
+        "cursor": cursor,
+        "archived": archived,
+        "archive_filter": status in ('all', 'completed'),
+        "stream": stream,
+        "due_filter": status in DUE_FILTERS,
+        "due_soon_hours": settings.TASK_DUE_SOON_HOURS,
+        "live_events": settings.LIVE_EVENTS,
+        # An unsaved task (id 0) renders the card markup live updates are cloned from
+        "live_card_tasks": [Task(id=0)] if settings.LIVE_EVENTS else [],
+    }
+
+    # Streaming mode renders every matching task without holding them in memory
+    if stream:
+        return stream_task_list(request, "myapp/home.html", context, user_tasks, cursor, archived_tasks)
+
+    context["user_tasks"], context["next_cursor"] = await apaginate_tasks(
+        user_tasks, cursor, get_page_size(request), archived_tasks
+    )
+    return render(request, "myapp/home.html", context)
+
+# Live Task Events
+@login_required
+async def task_events(request):
+    if not settings.LIVE_EVENTS:
+        # 204 tells EventSource not to reconnect
+        return HttpResponse(status=204)
+    try:
+        user_profile = await request_profile(request)
+    except UserProfile.DoesNotExist:
+        return HttpResponse(status=204)
+
+    is_admin = user_profile.role == "admin" or request.user.is_superuser
+    # Opens with absolute counters, so a reconnecting client recovers from any missed deltas
+    completed, total = await task_stats(user_profile, is_admin, None, '', 'all')
+    scope = GLOBAL_SCOPE if is_admin else request.user.pk
+    return event_stream(request, [channel_for(scope)], {'type': 'stats', 'completed': completed, 'total': total})
 
 # Complete Task
 @login_required
-def complete_task(request, task_id):
+async def complete_task(request, task_id):
     try:
-        user_profile = request.user.userprofile
+        user_profile = await request_profile(request)
     except UserProfile.DoesNotExist:
         messages.error(request, "User profile not found.")
         return redirect('login')
 
     # Allow admins to complete any task, others only their own
     task_filter = {} if (user_profile.role == "admin" or request.user.is_superuser) else {'user': request.user}
-    task = get_object_or_404(Task, id=task_id, **task_filter)
+    task = await aget_object_or_404(Task, id=task_id, **task_filter)
 
     task.is_completed = True
-    task.save()
+    await task.asave(update_fields=['is_completed'])
+    if wants_json(request):
+        return HttpResponse(status=204)
     messages.success(request, "🎉 Task marked as completed!")
     return redirect('dashboard')
 
 # Delete Task
 @login_required
 @require_POST
-def delete_task(request, task_id):
+async def delete_task(request, task_id):
     try:
-        user_profile = request.user.userprofile
+        user_profile = await request_profile(request)
     except UserProfile.DoesNotExist:
         messages.error(request, "User profile not found.")
         return redirect('login')
 
     # Allow admins to delete any task, others only their own
     task_filter = {} if (user_profile.role == "admin" or request.user.is_superuser) else {'user': request.user}
-    task = get_object_or_404(Task, id=task_id, **task_filter)
-    task.delete()
+    task = await aget_object_or_404(Task, id=task_id, **task_filter)
+    await task.adelete()
+    if wants_json(request):
+        return HttpResponse(status=204)
     messages.success(request, "🗑️ Task deleted successfully!")
     return redirect('dashboard')
 
 # Edit Task
 @login_required
-def edit_task(request, task_id):
+async def edit_task(request, task_id):
     try:
-        user_profile = request.user.userprofile
+        user_profile = await request_profile(request)
     except UserProfile.DoesNotExist:
         messages.error(request, "User profile not found.")
         return redirect('login')
 
     # Allow admins to edit any task, others only their own
     task_filter = {} if (user_profile.role == "admin" or request.user.is_superuser) else {'user': request.user}
-    task = get_object_or_404(Task, id=task_id, **task_filter)
+    task = await aget_object_or_404(Task, id=task_id, **task_filter)
     form = TaskForm(request.POST or None, instance=task)
     if request.method == "POST" and form.is_valid():
-        form.save()
+        await sync_to_async(form.save)()
         messages.success(request, "✏️ Task updated successfully!")
         return redirect('dashboard')
     return render(request, "myapp/edit_task.html", {"form": form, "task": task})
 
+def bulk_payload(request):
+    """Read ``ids``/``filter``/``changes`` from a JSON body or a form post."""
+    if request.content_type == 'application/json':
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            raise ValueError("Request body is not valid JSON.")
+        if not isinstance(payload, dict):
+            raise ValueError("Request body must be a JSON object.")
+    else:
+        payload = {'changes': {k: v for k, v in request.POST.items() if k in BulkTaskEditForm.Meta.fields}}
+        if 'ids' in request.POST:
+            payload['ids'] = request.POST.getlist('ids')
+        if 'status' in request.POST or 'task_query' in request.POST:
+            payload['filter'] = {k: request.POST.get(k, '') for k in ('status', 'task_query')}
+
+    if 'ids' not in payload and 'filter' not in payload:
+        raise ValueError("Provide either 'ids' or 'filter'.")
+    for key in ('filter', 'changes'):
+        if not isinstance(payload.get(key) or {}, dict):
+            raise ValueError(f"'{key}' must be an object.")
+    if 'ids' in payload:
+        try:
+            payload['ids'] = sorted({int(task_id) for task_id in payload['ids']})
+        except (TypeError, ValueError):
+            raise ValueError("'ids' must be a list of task ids.")
+        if len(payload['ids']) > settings.BULK_TASKS_MAX:
+            raise ValueError(f"At most {settings.BULK_TASKS_MAX} ids per request.")
+    return payload
+
+# Bulk Complete / Delete / Edit Tasks
+@login_required
+@require_POST
+def bulk_tasks(request, action):
+    if action not in BULK_ACTIONS:
+        raise Http404
+    try:
+        user_profile = request.user.userprofile
+    except UserProfile.DoesNotExist:
+        return JsonResponse({"error": "User profile not found."}, status=403)
+
+    try:
+        payload = bulk_payload(request)
+    except ValueError as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    changes = None
+    if action == 'edit':
+        form = BulkTaskEditForm(payload.get('changes') or {})
+        if not form.fields:
+            return JsonResponse({"error": "No changes given."}, status=400)
+        if not form.is_valid():
+            return JsonResponse({"error": "Invalid changes.", "fields": form.errors}, status=400)
+        changes = form.changes()
+
+    # Same rules as the single-task views: admins act on any task, others only their own
+    is_admin = user_profile.role == "admin" or request.user.is_superuser
+    task_filter = payload.get('filter') or {}
+    tasks = filter_tasks(
+        request.user, is_admin, task_filter.get('task_query', ''), task_filter.get('status', 'all')
+    )
+    results, more = run_bulk_action(
+        action, tasks, ids=payload.get('ids'), changes=changes, limit=settings.BULK_TASKS_MAX
+    )
+    return JsonResponse({
+        "action": action,
+        "results": {str(task_id): outcome for task_id, outcome in results.items()},
+        "more": more,
+    })
+
 # Register User
 def register_user(request):
     form = RegisterForm(request.POST or None)
     if request.method == "POST" and form.is_valid():
+        # The post_save signal creates the profile
         user = form.save()
-        if not UserProfile.objects.filter(user=user).exists():
-            UserProfile.objects.create(
-                user=user,
-                name=user.username,
-                email=user.email,
-                role='user'
-            )
         login(request, user)
         messages.success(request, "✅ Registration successful!")
         return redirect("dashboard")
@@ -204,10 +416,15 @@ def edit_profile(request, user_id):
         messages.error(request, "❌ Unauthorized access.")
         return redirect("dashboard")
 
-    profile = get_object_or_404(UserProfile, user__id=user_id)
-    form = UserProfileForm(request.POST or None, instance=profile)
+    profile = get_object_or_404(UserProfile.objects.select_related('user'), user__id=user_id)
+    form = UserProfileForm(request.POST or None, request.FILES or None, instance=profile)
     if request.method == "POST" and form.is_valid():
+        if 'avatar' in form.changed_data:
+            # The old thumbnails stay in place until the new upload is processed
+            profile.avatar_hash = ''
         form.save()
+        if 'avatar' in form.changed_data and profile.avatar:
+            schedule_avatar_processing(profile.pk)
         messages.success(request, f"👤 {profile.user.username}'s profile updated!")
         return redirect("dashboard")
     return render(request, "myapp/edit_profile.html", {"form": form, "user": profile})
@@ -225,9 +442,108 @@ def delete_user(request, user_id):
         messages.error(request, "❌ Unauthorized access.")
         return redirect("dashboard")
 
-    profile = get_object_or_404(UserProfile, user__id=user_id)
+    profile = get_object_or_404(UserProfile.objects.select_related('user'), user__id=user_id)
     if request.method == "POST":
-        profile.user.delete()
-        messages.success(request, f"❌ {profile.name}'s account deleted.")
+        # Deactivating logs the user out at once; the job worker deletes their tasks in batches
+        User.objects.filter(pk=profile.user_id).update(is_active=False)
+        enqueue('delete_user', key=str(profile.user_id), user_id=profile.user_id)
+        messages.success(request, f"❌ {profile.name}'s account is being deleted.")
         return redirect("dashboard")
-    return render(request, "myapp/confirm_delete_user.html", {"user": profile})
\ No newline at end of file
+    return render(request, "myapp/confirm_delete_user.html", {"user": profile})
+
+# Admin: Export Tasks
+@login_required
+def task_export(request):
+    try:
+        user_profile = request.user.userprofile
+    except UserProfile.DoesNotExist:
+        messages.error(request, "User profile not found.")
+        return redirect('login')
+
+    if not (user_profile.role == "admin" or request.user.is_superuser):
+        messages.error(request, "❌ Unauthorized access.")
+        return redirect("dashboard")
+
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        fmt = 'csv'
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    tasks, chunk_size = Task.objects.all(), settings.TASK_EXPORT_CHUNK_SIZE
+    response = streaming_response(
+        request,
+        lambda: export_tasks(tasks, fmt, chunk_size),
+        lambda: aexport_tasks(tasks, fmt, chunk_size),
+        content_type=content_type,
+    )
+    response['Content-Disposition'] = f'attachment; filename="tasks.{fmt}"'
+    return response
+
+# Admin: Import Tasks
+@login_required
+@require_POST
+def task_import(request):
+    try:
+        user_profile = request.user.userprofile
+    except UserProfile.DoesNotExist:
+        messages.error(request, "User profile not found.")
+        return redirect('login')
+
+    if not (user_profile.role == "admin" or request.user.is_superuser):
+        messages.error(request, "❌ Unauthorized access.")
+        return redirect("dashboard")
+
+    upload = request.FILES.get('file')
+    if not upload:
+        messages.error(request, "❌ Choose a CSV or JSONL file to import.")
+        return redirect("dashboard")
+
+    try:
+        check_utf8(upload.chunks())
+    except UnicodeDecodeError:
+        messages.error(request, "❌ The file isn't UTF-8 text. Save it as CSV UTF-8 or JSONL and try again.")
+        return redirect("dashboard")
+    upload.seek(0)
+
+    # Rows without a username column belong to the importing admin. utf-8-sig drops
+    # the byte-order mark spreadsheet apps put at the start of their CSV exports
+    lines = io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+    created, errors = import_tasks(
+        read_records(lines, guess_format(upload.name)),
+        default_user=request.user,
+        chunk_size=settings.TASK_IMPORT_CHUNK_SIZE,
+    )
+    messages.success(request, f"📥 Imported {created} task(s).")
+    if errors:
+        first_errors = "; ".join(f"line {number}: {', '.join(problems)}" for number, problems in errors[:5])
+        messages.error(request, f"❌ Skipped {len(errors)} invalid row(s). {first_errors}")
+    return redirect("dashboard")
+
+# Admin: Request Metrics
+@login_required
+def request_metrics(request):
+    try:
+        user_profile = request.user.userprofile
+    except UserProfile.DoesNotExist:
+        messages.error(request, "User profile not found.")
+        return redirect('login')
+
+    if not (user_profile.role == "admin" or request.user.is_superuser):
+        messages.error(request, "❌ Unauthorized access.")
+        return redirect("dashboard")
+
+    if request.method == "POST" and 'reset' in request.POST:
+        metrics_store.reset(request_metric_names())
+    return JsonResponse({
+        "enabled": settings.INSTRUMENTATION,
+        "urls": metrics_store.snapshot(request_metric_names()),
+    })
+
+# Avatar Files
+def avatar_file(request, path):
+    response = serve(request, f'avatars/{path}', document_root=settings.MEDIA_ROOT)
+    # Processed files live under their content hash, so a URL never changes what it serves
+    if '/' in path:
+        response['Cache-Control'] = f'public, max-age={settings.AVATAR_CACHE_SECONDS}, immutable'
+    else:
+        response['Cache-Control'] = 'no-cache'
+    return response